@@ -0,0 +1,44 @@
+import sqlalchemy as sa
+from app import db
+from app.feed import paginate
+from app.models import User, Post, File, Submission
+
+# Sorts after every character, so [prefix, prefix + _LAST) is the range of
+# usernames starting with prefix
+_LAST = '\U0010ffff'
+
+COUNTED = {'posts': Post, 'files': File, 'submissions': Submission}
+
+
+def user_page(limit, before=None, after=None, role=None, prefix=None):
+    """A keyset-paginated page of users in username order, optionally only
+    those with role and those whose username starts with prefix.
+    """
+    query = sa.select(User)
+    if role is not None:
+        query = query.where(User.role == role)
+    if prefix:
+        # The range bounds the scan of the username index; LIKE keeps it
+        # exact under collations that order punctuation loosely
+        query = query.where(User.username >= prefix, User.username < prefix + _LAST,
+                            User.username.startswith(prefix, autoescape=True))
+    return paginate(query, (User.username, User.id), limit,
+                    before=before, after=after, descending=False)
+
+
+def activity_counts(user_ids):
+    """{user id: {'posts': n, 'files': n, 'submissions': n}} for a page of
+    users, from one aggregate query over each table's user_id index.
+    """
+    counts = {ident: dict.fromkeys(COUNTED, 0) for ident in user_ids}
+    if not counts:
+        return counts
+    rows = sa.union_all(*(
+        sa.select(model.user_id, sa.literal(name).label('name'))
+        .where(model.user_id.in_(counts))
+        for name, model in COUNTED.items())).subquery()
+    for ident, name, count in db.session.execute(
+            sa.select(rows.c.user_id, rows.c.name, sa.func.count())
+            .group_by(rows.c.user_id, rows.c.name)):
+        counts[ident][name] = count
+    return counts
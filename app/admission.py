@@ -0,0 +1,225 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from functools import wraps
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows caps uploads per process
+    fcntl = None
+from flask import current_app, request
+from flask_login import current_user
+from werkzeug.exceptions import TooManyRequests
+
+# Seconds between sweeps of buckets that have refilled completely
+PRUNE_INTERVAL = 60
+# Seconds between tries for a free upload slot
+SLOT_POLL_INTERVAL = 0.05
+
+
+class MemoryStore:
+    """Token buckets in this process only (each worker keeps its own)."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        """Take a token from bucket key, returning 0 or, if it is empty,
+        the seconds until it holds one again.
+        """
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens < 1:
+                return (1 - tokens) / rate
+            tokens -= 1
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return 0
+
+    def prune(self, now):
+        with self._lock:
+            for key in [key for key, (*_, full_at) in self._buckets.items() if full_at < now]:
+                del self._buckets[key]
+
+
+class SQLiteStore:
+    """Token buckets in a SQLite file, shared by every worker on the host.
+
+    A bucket is updated by one upsert, so concurrent workers never both
+    take its last token.  The file holds only counters, so it skips fsync.
+    """
+
+    # Refill by the time since the last take, then take one token, but
+    # only if that leaves the bucket at zero or more
+    _TAKE = """
+        INSERT INTO bucket (key, tokens, updated, full_at) VALUES
+            (:key, :burst - 1, :now, :now + 1 / :rate)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:burst, tokens + (:now - updated) * :rate) - 1,
+            updated = :now,
+            full_at = :now + (:burst + 1 - min(:burst, tokens + (:now - updated) * :rate)) / :rate
+        WHERE min(:burst, tokens + (:now - updated) * :rate) >= 1
+        RETURNING tokens
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute('CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, '
+                               'tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)')
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, rate, burst, now):
+        connection = self._connection()
+        params = {'key': key, 'rate': rate, 'burst': burst, 'now': now}
+        if connection.execute(self._TAKE, params).fetchall():
+            return 0
+        tokens, updated = connection.execute(
+            'SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+        return (1 - min(burst, tokens + (now - updated) * rate)) / rate
+
+    def prune(self, now):
+        self._connection().execute('DELETE FROM bucket WHERE full_at < ?', (now,))
+
+
+class SlotFiles:
+    """count slots shared by every worker on the host, one lock file each
+    in folder.  A slot is held with flock(), which the kernel releases if
+    the worker dies, so a crash never leaks one.
+    """
+
+    def __init__(self, folder, count):
+        os.makedirs(folder, exist_ok=True)
+        self.paths = [os.path.join(folder, f'slot-{n}') for n in range(count)]
+
+    def acquire(self, timeout):
+        """The open file of a free slot, or None if none came free within
+        timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            for path in self.paths:
+                slot = open(path, 'a')
+                try:
+                    fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return slot
+                except BlockingIOError:
+                    slot.close()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(SLOT_POLL_INTERVAL)
+
+    def release(self, slot):
+        # Closing the file drops its lock
+        slot.close()
+
+
+class SemaphoreSlots:
+    """count slots in this process only, where flock() is unavailable."""
+
+    def __init__(self, count):
+        self._semaphore = threading.BoundedSemaphore(count)
+
+    def acquire(self, timeout):
+        return self._semaphore if self._semaphore.acquire(timeout=timeout) else None
+
+    def release(self, slot):
+        slot.release()
+
+
+# Set up by init_app
+_store = None
+_uploads = None
+_next_prune = 0
+
+
+def init_app(app):
+    global _store, _uploads
+    storage = app.config['RATELIMIT_STORAGE']
+    _store = MemoryStore() if storage == 'memory' else SQLiteStore(storage)
+    slots = app.config['UPLOAD_CONCURRENCY']
+    if not slots:
+        _uploads = None
+    elif fcntl is None:
+        _uploads = SemaphoreSlots(slots)
+    else:
+        _uploads = SlotFiles(app.config['UPLOAD_SLOTS_FOLDER'], slots)
+
+
+def admit(budget, user=None):
+    """Take a token from each of budget's buckets for this client (by IP)
+    and user, raising 429 Too Many Requests if any of them is empty.
+    """
+    global _next_prune
+    now = time.time()
+    if now >= _next_prune:
+        _next_prune = now + PRUNE_INTERVAL
+        _store.prune(now)
+    identities = {'ip': request.remote_addr, 'user': user}
+    wait = 0
+    for scope, (requests, seconds) in current_app.config['RATE_LIMITS'][budget].items():
+        if identities[scope] is not None:
+            key = '{}:{}:{}'.format(budget, scope, identities[scope])
+            wait = max(wait, _store.take(key, requests / seconds, requests, now))
+    if wait:
+        raise TooManyRequests(retry_after=math.ceil(wait))
+
+
+def rate_limit(budget, user_field=None):
+    """Admit POSTs to the decorated view against the RATE_LIMITS budget.
+
+    The user is the logged-in user, or for views used before logging in,
+    the value of the form field user_field (e.g. the username tried) from
+    this client's address: keyed on the name alone, anyone could use up
+    a classmate's budget and lock them out.  GETs are not counted, they
+    only show the form.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            if request.method == 'POST' and current_app.config['RATELIMIT_ENABLED']:
+                if user_field:
+                    user = request.form.get(user_field) or None
+                    if user is not None:
+                        user = '{}@{}'.format(user, request.remote_addr)
+                else:
+                    user = current_user.id if current_user.is_authenticated else None
+                admit(budget, user)
+            return f(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+def upload_slot(f):
+    """Run POSTs to the decorated view holding one of the host's
+    UPLOAD_CONCURRENCY upload slots.
+
+    A request waits up to UPLOAD_QUEUE_TIMEOUT seconds for a free slot and
+    is then turned away with 429, so a burst of uploads queues briefly and
+    sheds the rest instead of slowing every request down.  The request
+    body is only read once a slot is held.
+    """
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        if request.method != 'POST' or _uploads is None:
+            return f(*args, **kwargs)
+        timeout = current_app.config['UPLOAD_QUEUE_TIMEOUT']
+        slot = _uploads.acquire(timeout)
+        if slot is None:
+            raise TooManyRequests(retry_after=math.ceil(timeout) or 1)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _uploads.release(slot)
+    return wrapped
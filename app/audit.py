@@ -0,0 +1,114 @@
+import atexit
+import threading
+from collections import deque
+from datetime import datetime, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from flask_login import current_user
+from app import db
+from app.feed import paginate
+from app.models import AuditEvent, User
+
+# Actions recorded by the routes, also the choices of the audit log filter
+ACTIONS = {
+    'post.delete': 'Deleted post',
+    'user.role': 'Changed role',
+    'submission.marks': 'Updated marks',
+    'submission.marks_import': 'Imported marks',
+    'file.delete': 'Deleted file',
+}
+
+_buffer = deque()
+_wake = threading.Event()
+_flush_lock = threading.Lock()
+_flusher = None
+_start_lock = threading.Lock()
+
+
+@sa.event.listens_for(AuditEvent, 'before_update')
+@sa.event.listens_for(AuditEvent, 'before_delete')
+def _append_only(mapper, connection, target):
+    raise RuntimeError('Audit events are append-only')
+
+
+def record(action, target=None, details=None, actor=None):
+    """Queue an audit event; it is written by the background flusher.
+
+    Only a dict is appended to an in-memory buffer here, so a mutating
+    route pays no database round trip for auditing.  Events are written in
+    batches of up to AUDIT_BATCH_SIZE every AUDIT_FLUSH_INTERVAL seconds
+    (or sooner once a batch is full), and on interpreter exit.
+    """
+    if actor is None and current_user and current_user.is_authenticated:
+        actor = current_user
+    _buffer.append({
+        'timestamp': datetime.now(timezone.utc),
+        'actor_id': actor.id if actor is not None else None,
+        'action': action,
+        'target_type': type(target).__name__.lower() if target is not None else None,
+        'target_id': target.id if target is not None else None,
+        'details': details[:255] if details else None,
+    })
+    if not current_app.config['AUDIT_ASYNC']:
+        flush()
+    elif len(_buffer) >= current_app.config['AUDIT_BATCH_SIZE']:
+        _wake.set()
+    _start_flusher()
+
+
+def flush(app=None):
+    """Write every buffered event in one bulk INSERT transaction."""
+    app = app or current_app._get_current_object()
+    with _flush_lock:
+        rows = []
+        while _buffer:
+            rows.append(_buffer.popleft())
+        if not rows:
+            return 0
+        with app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(sa.insert(AuditEvent.__table__), rows)
+        return len(rows)
+
+
+def _flush_loop(app):
+    while True:
+        _wake.wait(app.config['AUDIT_FLUSH_INTERVAL'])
+        _wake.clear()
+        try:
+            flush(app)
+        except Exception:
+            app.logger.exception('Could not write audit events')
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is not None or not current_app.config['AUDIT_ASYNC']:
+        return
+    app = current_app._get_current_object()
+    with _start_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, args=(app,),
+                                        daemon=True, name='audit-flusher')
+            _flusher.start()
+            atexit.register(flush, app)
+
+
+def audit_events(limit, before=None, after=None, actor=None, action=None,
+                 since=None, until=None):
+    """A keyset-paginated page of the audit log, newest first, filtered by
+    actor username, action and a [since, until) time range.
+    """
+    query = sa.select(AuditEvent).options(so.joinedload(AuditEvent.actor))
+    if actor:
+        query = query.where(AuditEvent.actor_id == sa.select(User.id)
+                            .where(User.username == actor).scalar_subquery())
+    if action:
+        query = query.where(AuditEvent.action == action)
+    if since:
+        query = query.where(AuditEvent.timestamp >= since)
+    if until:
+        query = query.where(AuditEvent.timestamp < until)
+    return paginate(query, (AuditEvent.timestamp, AuditEvent.id), limit,
+                    before=before, after=after)
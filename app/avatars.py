@@ -0,0 +1,27 @@
+import re
+
+DIGEST = re.compile(r'^[0-9a-f]{32}$')
+
+# Range of sizes served
+MIN_SIZE = 8
+MAX_SIZE = 512
+
+
+def identicon_svg(digest, size):
+    """A GitHub style 5x5 mirrored identicon for an MD5 hex digest."""
+    value = int(digest, 16)
+    hue = value % 360
+    colour = f'hsl({hue}, 55%, 50%)'
+    cells = []
+    for row in range(5):
+        for col in range(3):
+            if (value >> (8 + row * 3 + col)) & 1:
+                cells.append((col, row))
+                if col < 2:
+                    cells.append((4 - col, row))
+    rects = ''.join(f'<rect x="{x + 0.5}" y="{y + 0.5}" width="1" height="1"/>'
+                    for x, y in cells)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" '
+            f'height="{size}" viewBox="0 0 6 6" shape-rendering="crispEdges">'
+            f'<rect width="6" height="6" fill="#f0f0f0"/>'
+            f'<g fill="{colour}">{rects}</g></svg>')
@@ -0,0 +1,88 @@
+import sqlalchemy as sa
+from flask import request
+from flask_sqlalchemy.session import Session
+
+# Bind key of the optional read-only engine used by GET and HEAD requests
+READONLY = 'readonly'
+
+
+def _is_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def readonly_url(uri):
+    """The same SQLite file opened read-only, as a second pool of
+    connections that can never take the write lock.
+    """
+    url = sa.engine.make_url(uri)
+    if url.get_backend_name() != 'sqlite' or _is_memory(url):
+        return uri
+    return url.set(database='file:' + url.database,
+                   query={'mode': 'ro', 'uri': 'true'})
+
+
+def configure(config):
+    """Fill in SQLALCHEMY_ENGINE_OPTIONS and SQLALCHEMY_BINDS from the DB_*
+    settings.  Must run before the engines are created.
+    """
+    url = sa.engine.make_url(config['SQLALCHEMY_DATABASE_URI'])
+    pool = {}
+    if not _is_memory(url):
+        pool = {'pool_size': config['DB_POOL_SIZE'],
+                'max_overflow': config['DB_POOL_OVERFLOW'],
+                'pool_timeout': config['DB_POOL_TIMEOUT']}
+    if url.get_backend_name() == 'postgresql':
+        # Timestamps are stored as naive UTC, so keep PostgreSQL from
+        # converting aware datetimes to the server's local time
+        pool['connect_args'] = {'options': '-c timezone=utc'}
+    options = config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    for name, value in pool.items():
+        options.setdefault(name, value)
+    if config['DB_READONLY']:
+        uri = config['DATABASE_READONLY_URL'] or readonly_url(config['SQLALCHEMY_DATABASE_URI'])
+        config.setdefault('SQLALCHEMY_BINDS', {})[READONLY] = dict(pool, url=uri)
+
+
+def _pragmas(pragmas, readonly):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            # The journal mode is a property of the file, set by writers
+            if readonly and name == 'journal_mode':
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+    return set_pragmas
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the read-only engine while
+    info[READONLY] is set, and everything else to the primary.  The first
+    write turns routing off for the rest of the session, so a request reads
+    its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(READONLY):
+            if not self._flushing and isinstance(clause, sa.Select):
+                return self._db.engines[READONLY]
+            if self._flushing or isinstance(clause, sa.UpdateBase):
+                self.info[READONLY] = False
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_app(app, db):
+    """Apply the SQLITE_PROFILE pragmas to every new SQLite connection and
+    route GET and HEAD requests to the read-only engine, if configured.
+    """
+    pragmas = app.config['SQLITE_PROFILES'][app.config['SQLITE_PROFILE']]
+    with app.app_context():
+        engines = dict(db.engines)
+    for key, engine in engines.items():
+        if engine.dialect.name == 'sqlite' and pragmas:
+            sa.event.listen(engine, 'connect', _pragmas(pragmas, key == READONLY))
+
+    if READONLY in engines:
+        @app.before_request
+        def _read_only_request():
+            db.session.info[READONLY] = request.method in ('GET', 'HEAD')
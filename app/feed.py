@@ -0,0 +1,153 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import request, url_for
+from app import db
+from app.models import FILE_SHARED, File, Post
+
+
+@dataclass
+class FeedPage:
+    items: list
+    older: Optional[str] = None
+    newer: Optional[str] = None
+
+
+def _encode_value(value):
+    return {'dt': value.isoformat()} if isinstance(value, datetime) else value
+
+
+def _decode_value(value):
+    return datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+
+
+def encode_cursor(*values):
+    """Opaque URL-safe cursor holding the sort key values of a row."""
+    raw = json.dumps([_encode_value(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return the key values in a cursor, raising ValueError if it is bad."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        values = tuple(_decode_value(value) for value in json.loads(raw))
+    except (UnicodeError, TypeError, KeyError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+    if len(values) != 2:
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def keyset_page(query, columns, limit, before=None, after=None, descending=True):
+    """Run one keyset-paginated page of query.
+
+    columns is the (sort column, unique tiebreaker) pair the cursor keys on,
+    e.g. (Post.timestamp, Post.id), and pages run newest (largest) first
+    unless descending is False.  before/after are decoded cursor tuples;
+    with before the page holds the rows that come after it in that order
+    ("older"), with after the rows that come before it ("newer").  The
+    range predicate is written so that an index on the sort column bounds
+    the scan, so the cost of a page does not depend on how deep into the
+    history it is.  Returns (rows, has_older, has_newer).
+    """
+    key, tiebreak = columns
+    forward = (key.desc(), tiebreak.desc()) if descending else (key.asc(), tiebreak.asc())
+    backward = (key.asc(), tiebreak.asc()) if descending else (key.desc(), tiebreak.desc())
+    if after is not None:
+        value, ident = after
+        if descending:
+            query = query.where(key >= value, sa.or_(key > value, tiebreak > ident))
+        else:
+            query = query.where(key <= value, sa.or_(key < value, tiebreak < ident))
+        query = query.order_by(*backward)
+    else:
+        if before is not None:
+            value, ident = before
+            if descending:
+                query = query.where(key <= value, sa.or_(key < value, tiebreak < ident))
+            else:
+                query = query.where(key >= value, sa.or_(key > value, tiebreak > ident))
+        query = query.order_by(*forward)
+
+    rows = db.session.scalars(query.limit(limit + 1)).unique().all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if after is not None:
+        rows.reverse()
+        return rows, True, more
+    return rows, more, before is not None
+
+
+def paginate(query, columns, limit, before=None, after=None, descending=True):
+    """A FeedPage of query with older/newer cursors.
+
+    before/after are cursor strings from a previous page; a malformed one
+    raises ValueError.
+    """
+    rows, has_older, has_newer = keyset_page(
+        query, columns, limit,
+        before=decode_cursor(before) if before else None,
+        after=decode_cursor(after) if after else None,
+        descending=descending)
+    if after and not rows:
+        # Nothing newer any more, show the first page instead of an empty one
+        return paginate(query, columns, limit, descending=descending)
+
+    def cursor(row):
+        return encode_cursor(*(getattr(row, column.key) for column in columns))
+
+    page = FeedPage(items=rows)
+    if rows and has_older:
+        page.older = cursor(rows[-1])
+    if rows and has_newer:
+        page.newer = cursor(rows[0])
+    return page
+
+
+def post_feed(limit, before=None, after=None, author=None):
+    """A page of the discussion board, or of one author's posts, with each
+    post's author loaded in the same query.
+    """
+    query = sa.select(Post).options(so.joinedload(Post.author))
+    if author is not None:
+        query = query.where(Post.user_id == author.id)
+    return paginate(query, (Post.timestamp, Post.id), limit,
+                    before=before, after=after)
+
+
+def file_feed(limit, before=None, after=None):
+    """A page of the shared files board, newest first, walked on the
+    (kind, timestamp) index so submission files cost nothing to skip.
+    """
+    query = (sa.select(File).where(File.kind == FILE_SHARED)
+             .options(so.joinedload(File.uploader)))
+    return paginate(query, (File.timestamp, File.id), limit,
+                    before=before, after=after)
+
+
+def page_url(**cursor):
+    """The current URL with its query string kept but the cursor replaced."""
+    args = {key: value for key, value in request.args.items()
+            if key not in ('before', 'after')}
+    args.update(request.view_args or {})
+    args.update(cursor)
+    return url_for(request.endpoint, **args)
+
+
+def init_app(app):
+    app.add_template_global(page_url)
+
+
+def post_to_dict(post):
+    return {
+        'id': post.id,
+        'body': post.body,
+        'timestamp': post.timestamp.isoformat(),
+        'author': post.author.username,
+        'avatar': post.author.avatar(70),
+    }
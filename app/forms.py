@@ -1,10 +1,10 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, BooleanField, IntegerField, FloatField, DateField
-from flask_wtf.file import FileField
-from wtforms.validators import ValidationError, DataRequired, Email, EqualTo, NumberRange
+from wtforms import StringField, PasswordField, SubmitField, BooleanField, IntegerField, FloatField, DateField, SelectField
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms.validators import ValidationError, DataRequired, Email, EqualTo, NumberRange, Optional
 import sqlalchemy as sa
 from app import db
-from app.models import User, Post
+from app.models import ROLES, User, Post
 
 class LoginForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
@@ -81,4 +81,35 @@ class AssignmentForm(FlaskForm):
 class MarksForm(FlaskForm):
     marks = FloatField('Marks', validators=[DataRequired()])
     submit = SubmitField('Submit Marks')
-    
\ No newline at end of file
+
+class MarksImportForm(FlaskForm):
+    file = FileField('Marks file (CSV or JSON)', validators=[FileRequired(), FileAllowed(['csv', 'json'], 'CSV or JSON files only')])
+    submit = SubmitField('Import Marks')
+
+class AuditFilterForm(FlaskForm):
+    class Meta:
+        csrf = False
+
+    actor = StringField('User', validators=[Optional()])
+    action = SelectField('Action', validators=[Optional()])
+    since = DateField('From', validators=[Optional()])
+    until = DateField('Until', validators=[Optional()])
+    submit = SubmitField('Filter')
+
+
+class SearchForm(FlaskForm):
+    class Meta:
+        csrf = False
+
+    q = StringField('Search', validators=[DataRequired()])
+    submit = SubmitField('Search')
+
+
+class UserFilterForm(FlaskForm):
+    class Meta:
+        csrf = False
+
+    role = SelectField('Role', choices=[('', 'Any role')] + [(str(role), name) for role, name in ROLES.items()],
+                       validators=[Optional()])
+    prefix = StringField('Username starts with', validators=[Optional()])
+    submit = SubmitField('Filter')
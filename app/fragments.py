@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+import sqlalchemy as sa
+from flask import current_app
+from markupsafe import Markup
+from app.models import Post, File
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered HTML, capped by entries and total size."""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._by_object = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key, html):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = html
+            self._by_object.setdefault(key[1:3], set()).add(key)
+            self.size += len(html)
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self.size > self.max_bytes):
+                self._discard(next(iter(self._entries)))
+
+    def evict(self, model, ident):
+        """Drop every fragment rendered for one row, whatever its version."""
+        with self._lock:
+            for key in list(self._by_object.get((model, ident), ())):
+                self._discard(key)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_object.clear()
+            self.size = 0
+
+    def _discard(self, key):
+        html = self._entries.pop(key, None)
+        if html is not None:
+            self.size -= len(html)
+        keys = self._by_object.get(key[1:3])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_object[key[1:3]]
+
+
+# Sized from the config by init_app
+cache = FragmentCache(0, 0)
+
+
+def init_app(app):
+    cache.max_entries = app.config['FRAGMENT_CACHE_ENTRIES']
+    cache.max_bytes = app.config['FRAGMENT_CACHE_BYTES']
+    app.add_template_global(cached_row)
+
+
+def fragment_version(obj):
+    """Everything a row fragment shows, so any edit (including to the
+    author's name or email, which drives the avatar) yields a new key.
+    """
+    if isinstance(obj, Post):
+        user = obj.author
+        return (obj.body, obj.timestamp, user.id, user.username, user.email)
+    if isinstance(obj, File):
+        user = obj.uploader
+        return (obj.title, obj.description, obj.timestamp, obj.path,
+                user.id, user.username, user.email)
+    raise TypeError(f'No fragment version for {type(obj).__name__}')
+
+
+def cached_row(template_name, obj, name):
+    """Render template_name with obj bound to name, reusing cached HTML.
+
+    Keys are (template, model, id, version), where version holds the
+    values the fragment displays plus the avatar mode.
+    """
+    if not current_app.config['FRAGMENT_CACHE']:
+        return Markup(current_app.jinja_env.get_template(template_name).render({name: obj}))
+    key = (template_name, type(obj).__name__, obj.id, fragment_version(obj),
+           current_app.config['AVATAR_MODE'])
+    html = cache.get(key)
+    if html is None:
+        html = Markup(current_app.jinja_env.get_template(template_name).render({name: obj}))
+        cache.set(key, html)
+    return html
+
+
+@sa.event.listens_for(Post, 'after_update')
+@sa.event.listens_for(Post, 'after_delete')
+@sa.event.listens_for(File, 'after_update')
+@sa.event.listens_for(File, 'after_delete')
+def _evict_row(mapper, connection, target):
+    cache.evict(type(target).__name__, target.id)
@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import re
+import zipfile
+from xml.sax.saxutils import escape
+from flask import current_app
+from app.progress import NOT_SUBMITTED, SUBMITTED, OVERDUE, progress_assignments, progress_rows
+
+STATUS_NAMES = {NOT_SUBMITTED: 'not submitted', SUBMITTED: 'submitted',
+                OVERDUE: 'overdue'}
+
+# Rows rendered between chunks handed to the response
+ROWS_PER_CHUNK = 200
+
+# Text starting with one of these runs as a formula when a CSV is opened
+# in a spreadsheet
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _grid():
+    assignments = progress_assignments()
+    return assignments, progress_rows(assignments,
+                                      yield_per=current_app.config['GRADEBOOK_YIELD_PER'])
+
+
+def _table(assignments, rows):
+    """The gradebook as lists of cells, header first: username, email,
+    then a marks and a status column per assignment.
+    """
+    header = ['username', 'email']
+    for assignment in assignments:
+        header += [f'{assignment.title} marks', f'{assignment.title} status']
+    yield header
+    for student, status, marks in rows:
+        cells = [student.username, student.email]
+        for state, mark in zip(status, marks):
+            cells += [mark, STATUS_NAMES[state]]
+        yield cells
+
+
+def _chunks(lines):
+    chunk = []
+    for n, line in enumerate(lines, 1):
+        chunk.append(line)
+        if n % ROWS_PER_CHUNK == 0:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def _csv_cell(value):
+    """value for a CSV cell; text that a spreadsheet would take for a
+    formula (a username like =HYPERLINK(...)) is quoted with a leading '.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_csv():
+    assignments, rows = _grid()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def lines():
+        for cells in _table(assignments, rows):
+            writer.writerow([_csv_cell(cell) for cell in cells])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield from _chunks(lines())
+
+
+def export_ndjson():
+    """One JSON object per student, each cell keyed by assignment id."""
+    assignments, rows = _grid()
+
+    def lines():
+        for student, status, marks in rows:
+            yield json.dumps({
+                'username': student.username,
+                'email': student.email,
+                'assignments': [{'id': assignment.id, 'status': STATUS_NAMES[state],
+                                 'marks': mark}
+                                for assignment, state, mark in zip(assignments, status, marks)],
+            }) + '\n'
+    yield from _chunks(lines())
+
+
+class _Pipe(io.RawIOBase):
+    """Write-only stream whose contents are collected by drain()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>',
+    '_rels/.rels':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>',
+    'xl/workbook.xml':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Gradebook" sheetId="1" r:id="rId1"/></sheets></workbook>',
+    'xl/_rels/workbook.xml.rels':
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>',
+}
+
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _xlsx_cell(value):
+    # Text goes in inline strings, which are never evaluated as formulas
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_INVALID_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t>{text}</t></is></c>'
+
+
+def export_xlsx():
+    """The gradebook as a single-sheet workbook.
+
+    The zip is written to a pipe and its bytes are handed on as each batch
+    of rows is compressed, so the whole file is never held in memory.
+    """
+    assignments, rows = _grid()
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        for name, xml in XLSX_PARTS.items():
+            workbook.writestr(name, xml)
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+            lines = ('<row>' + ''.join(_xlsx_cell(cell) for cell in cells) + '</row>'
+                     for cells in _table(assignments, rows))
+            for chunk in _chunks(lines):
+                sheet.write(chunk.encode('utf-8'))
+                data = pipe.drain()
+                if data:
+                    yield data
+            sheet.write(b'</sheetData></worksheet>')
+    yield pipe.drain()
+
+
+# format: (generator, mimetype)
+FORMATS = {
+    'csv': (export_csv, 'text/csv'),
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+    'xlsx': (export_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+import math
+from dataclasses import dataclass, field
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db, audit, stats
+from app.jobs import job
+from app.models import Assignment, Submission, User
+
+
+def is_overdue(timestamp, duedate):
+    """Whether a submission made at timestamp missed duedate.
+
+    Datetimes are stored as naive UTC, so tzinfo is dropped to compare a
+    fresh timestamp with one read back from the database.
+    """
+    if duedate is None:
+        return False
+    return timestamp.replace(tzinfo=None) > duedate.replace(tzinfo=None)
+
+
+def update_overdue(assignment_ids=None, connection=None):
+    """Recompute Submission.overdue in bulk with one UPDATE correlated to
+    Assignment.duedate, for the given assignments or for all of them.
+
+    Only rows whose flag actually changes are written, and the statistics
+    of the assignments they belong to are refreshed.  Runs on the session's
+    connection (and transaction) unless one is given; returns the number
+    of submissions changed.
+    """
+    submission = Submission.__table__
+    duedate = (sa.select(Assignment.__table__.c.duedate)
+               .where(Assignment.__table__.c.id == submission.c.assignment_id)
+               .scalar_subquery())
+    late = sa.case((duedate.is_(None), sa.false()),
+                   else_=submission.c.timestamp > duedate)
+    query = (sa.update(submission)
+             .where(submission.c.overdue.is_distinct_from(late))
+             .values(overdue=late)
+             .returning(submission.c.assignment_id))
+    if assignment_ids is not None:
+        query = query.where(submission.c.assignment_id.in_(assignment_ids))
+    connection = connection or db.session.connection()
+    changed = connection.execute(query).scalars().all()
+    stats.refresh(changed, connection)
+    return len(changed)
+
+
+@job('overdue.sweep', every='OVERDUE_SWEEP_INTERVAL')
+def sweep_overdue():
+    """Periodic safety net for overdue flags changed outside the app's own
+    submission and due date paths, e.g. by a bulk import.
+    """
+    changed = update_overdue()
+    db.session.commit()
+    if changed:
+        current_app.logger.info('Overdue sweep corrected %s submissions', changed)
+
+
+@sa.event.listens_for(so.Session, 'after_flush')
+def _duedate_changed(session, flush_context):
+    changed = [obj.id for obj in session.dirty
+               if isinstance(obj, Assignment)
+               and sa.inspect(obj).attrs.duedate.history.has_changes()]
+    if changed:
+        update_overdue(changed, session.connection())
+
+
+@dataclass
+class MarksImport:
+    updated: int = 0
+    errors: list = field(default_factory=list)
+
+
+def parse_marks(data, filename):
+    """Rows of a marks file as dicts, from JSON (a list of objects, or an
+    object with a "marks" list) or CSV with a header row.  Each row names
+    its submission by submission_id or by the student's username and has a
+    marks value.  Raises ValueError if the file cannot be read at all.
+    """
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError as e:
+            raise ValueError('File is not UTF-8 text') from e
+    if filename.lower().endswith('.json'):
+        try:
+            rows = json.loads(data)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Invalid JSON: {e}') from e
+        if isinstance(rows, dict):
+            rows = rows.get('marks')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError('Expected a list of {"submission_id" or "username", "marks"} objects')
+        return rows
+    reader = csv.DictReader(io.StringIO(data))
+    fields = set(reader.fieldnames or ())
+    if 'marks' not in fields or not fields & {'submission_id', 'username'}:
+        raise ValueError('CSV needs a marks column and a submission_id or username column')
+    return list(reader)
+
+
+def import_marks(assignment, rows):
+    """Set the marks of many submissions to assignment in one transaction.
+
+    All submissions to the assignment are read in one query, every row is
+    checked against them and against the assignment's totalMarks, and only
+    if no row has an error are the marks written, as a single executemany
+    UPDATE.  Errors are reported per row, numbered from 1.
+    """
+    submissions = db.session.execute(
+        sa.select(Submission.id, Submission.marks, User.username)
+        .join(User, Submission.user_id == User.id)
+        .where(Submission.assignment_id == assignment.id)).all()
+    by_id = {s.id: s for s in submissions}
+    by_username = {s.username: s for s in submissions}
+    total = assignment.totalMarks
+
+    result = MarksImport()
+    updates = {}
+    for number, row in enumerate(rows, 1):
+        submission_id = row.get('submission_id')
+        username = row.get('username')
+        try:
+            submission = by_id.get(int(submission_id)) if submission_id not in (None, '') \
+                else by_username.get(username)
+        except (TypeError, ValueError):
+            submission = None
+        if submission is None:
+            result.errors.append({'row': number, 'error': 'No submission to this assignment for {}'.format(
+                f'submission {submission_id}' if submission_id not in (None, '') else f'user {username!r}')})
+            continue
+        try:
+            marks = float(row.get('marks'))
+        except (TypeError, ValueError):
+            result.errors.append({'row': number, 'error': f'Marks {row.get("marks")!r} is not a number'})
+            continue
+        if not math.isfinite(marks) or marks < 0 or (total is not None and marks > total):
+            result.errors.append({'row': number, 'error': f'Marks {marks:g} is not between 0 and {total:g}'
+                                  if total is not None else f'Marks {marks:g} is negative'})
+            continue
+        if submission.id in updates:
+            result.errors.append({'row': number, 'error': f'Submission {submission.id} appears more than once'})
+            continue
+        updates[submission.id] = marks
+
+    if result.errors or not updates:
+        return result
+    db.session.execute(sa.update(Submission),
+                       [{'id': ident, 'marks': marks} for ident, marks in updates.items()])
+    # A bulk UPDATE is not a flush, so refresh the stats explicitly
+    stats.refresh([assignment.id])
+    db.session.commit()
+    result.updated = len(updates)
+    audit.record('submission.marks_import', assignment,
+                 details='{} submissions'.format(result.updated))
+    return result
@@ -0,0 +1,168 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, template_rendered, before_render_template
+
+# Sink for one JSON line per request when INSTRUMENT_LOG is set
+request_log = logging.getLogger('app.requests')
+
+_lock = threading.Lock()
+# Sized from the config by init_app
+_recent = deque()
+_endpoints = {}
+
+
+def init_app(app):
+    global _recent
+    sink = app.config['INSTRUMENT_LOG']
+    if sink and not request_log.handlers:
+        request_log.addHandler(logging.StreamHandler() if sink == '-'
+                               else logging.FileHandler(sink))
+        request_log.setLevel(logging.INFO)
+        request_log.propagate = False
+    _recent = deque(maxlen=app.config['INSTRUMENT_HISTORY'])
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+class RequestStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.slowest = []
+        self.statements = Counter()
+
+    def add_query(self, statement, seconds):
+        self.queries += 1
+        self.db_seconds += seconds
+        self.statements[statement] += 1
+        self.slowest.append((seconds, statement))
+        if len(self.slowest) > current_app.config['INSTRUMENT_SLOWEST'] * 4:
+            self._trim()
+
+    def _trim(self):
+        self.slowest.sort(key=lambda entry: entry[0], reverse=True)
+        del self.slowest[current_app.config['INSTRUMENT_SLOWEST']:]
+
+    def n_plus_one(self):
+        """SELECTs repeated often enough in one request to look like N+1."""
+        threshold = current_app.config['N_PLUS_ONE_THRESHOLD']
+        return [{'statement': statement, 'count': count}
+                for statement, count in self.statements.most_common()
+                if count >= threshold and statement.lstrip().upper().startswith('SELECT')]
+
+
+def _current():
+    if not has_request_context():
+        return None
+    return g.get('_instrument')
+
+
+# The start time goes on the statement's execution context, which is
+# dropped with the statement whether or not it raised
+@sa.event.listens_for(sa.engine.Engine, 'before_cursor_execute')
+def _before_query(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current() is not None:
+        context._query_start = time.perf_counter()
+
+
+@sa.event.listens_for(sa.engine.Engine, 'after_cursor_execute')
+def _after_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    start = getattr(context, '_query_start', None)
+    if stats is None or start is None:
+        return
+    stats.add_query(statement, time.perf_counter() - start)
+
+
+def _before_render(sender, template, context, **extra):
+    stats = _current()
+    if stats is not None:
+        g._render_start = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    stats = _current()
+    start = g.pop('_render_start', None)
+    if stats is not None and start is not None:
+        stats.template_seconds += time.perf_counter() - start
+
+
+def _start_request():
+    if current_app.config['INSTRUMENT_REQUESTS']:
+        g._instrument = RequestStats()
+
+
+def _finish_request(response):
+    stats = _current()
+    if stats is None:
+        return response
+    total = time.perf_counter() - stats.start
+    response.headers.add('Server-Timing', 'db;dur={:.1f};desc="{} queries"'.format(
+        stats.db_seconds * 1000, stats.queries))
+    response.headers.add('Server-Timing', 'tpl;dur={:.1f}'.format(
+        stats.template_seconds * 1000))
+    response.headers.add('Server-Timing', 'app;dur={:.1f}'.format(total * 1000))
+    record(stats, response, total)
+    return response
+
+
+def record(stats, response, total):
+    """Add a finished request to the rolling stats and the optional log."""
+    stats._trim()
+    entry = {
+        'endpoint': request.endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'ms': round(total * 1000, 2),
+        'queries': stats.queries,
+        'db_ms': round(stats.db_seconds * 1000, 2),
+        'template_ms': round(stats.template_seconds * 1000, 2),
+        'slowest': [{'ms': round(seconds * 1000, 2), 'statement': statement}
+                    for seconds, statement in stats.slowest],
+        'n_plus_one': stats.n_plus_one(),
+    }
+    if entry['n_plus_one']:
+        current_app.logger.warning('Possible N+1 in %s: %s', request.endpoint,
+                                   ', '.join('{count}x {statement:.80}'.format(**n)
+                                             for n in entry['n_plus_one']))
+    with _lock:
+        _recent.append(entry)
+        summary = _endpoints.setdefault(entry['endpoint'], {
+            'requests': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            'queries': 0, 'max_queries': 0, 'db_ms': 0.0, 'n_plus_one': 0})
+        summary['requests'] += 1
+        summary['total_ms'] += entry['ms']
+        summary['max_ms'] = max(summary['max_ms'], entry['ms'])
+        summary['queries'] += entry['queries']
+        summary['max_queries'] = max(summary['max_queries'], entry['queries'])
+        summary['db_ms'] += entry['db_ms']
+        summary['n_plus_one'] += bool(entry['n_plus_one'])
+    if current_app.config['INSTRUMENT_LOG']:
+        request_log.info(json.dumps(entry))
+
+
+def snapshot():
+    """Per-endpoint averages plus the most recent requests, newest first."""
+    with _lock:
+        endpoints = {
+            endpoint: {
+                'requests': s['requests'],
+                'mean_ms': round(s['total_ms'] / s['requests'], 2),
+                'max_ms': s['max_ms'],
+                'mean_queries': round(s['queries'] / s['requests'], 2),
+                'max_queries': s['max_queries'],
+                'mean_db_ms': round(s['db_ms'] / s['requests'], 2),
+                'n_plus_one_requests': s['n_plus_one'],
+            }
+            for endpoint, s in _endpoints.items()}
+        recent = list(reversed(_recent))
+    return {'endpoints': endpoints, 'recent': recent}
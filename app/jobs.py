@@ -0,0 +1,272 @@
+import json
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db
+from app.models import Job
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+handlers = {}
+# kind -> seconds (or the config key holding them) between runs, for jobs
+# registered with every=
+periodic = {}
+
+_workers = []
+_wake = threading.Event()
+_start_lock = threading.Lock()
+
+
+def job(kind, every=None):
+    """Register the decorated function as the handler for jobs of kind.
+
+    Handlers are called with the job's payload as keyword arguments inside
+    an application context; raising makes the job retry with backoff.
+    With every (seconds, or the name of the config key holding them), one
+    run of the job is kept queued while workers are running, each run
+    queueing the next.
+    """
+    def decorator(f):
+        handlers[kind] = f
+        if every:
+            periodic[kind] = every
+        return f
+    return decorator
+
+
+def enqueue(kind, delay=0, max_attempts=None, **payload):
+    """Add a job to the current session; it becomes visible on commit.
+
+    Queuing in the caller's transaction means a job is never run for work
+    that was rolled back, and costs the request one INSERT.  A periodic
+    job holds its kind as unique key while queued or running, so a second
+    pending run fails to commit rather than starting another chain.
+    """
+    entry = Job(kind=kind, payload=json.dumps(payload),
+                run_after=datetime.now(timezone.utc) + timedelta(seconds=delay),
+                max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+                unique_key=kind if kind in periodic else None)
+    db.session.add(entry)
+    db.session.info['jobs_queued'] = True
+    start_workers()
+    return entry
+
+
+@sa.event.listens_for(so.Session, 'after_commit')
+def _wake_workers(session):
+    if session.info.pop('jobs_queued', False):
+        _wake.set()
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number attempts (exponential, capped)."""
+    base = current_app.config['JOB_RETRY_BACKOFF']
+    return min(base * 2 ** (attempts - 1), current_app.config['JOB_RETRY_BACKOFF_MAX'])
+
+
+def interval(kind):
+    """Seconds between runs of the periodic job kind."""
+    every = periodic[kind]
+    return current_app.config[every] if isinstance(every, str) else every
+
+
+def claim():
+    """Atomically move the oldest due job from queued to running."""
+    now = datetime.now(timezone.utc)
+    while True:
+        job_id = db.session.scalar(
+            sa.select(Job.id)
+            .where(Job.status == QUEUED, Job.run_after <= now)
+            .order_by(Job.run_after, Job.id).limit(1))
+        if job_id is None:
+            db.session.rollback()
+            return None
+        claimed = db.session.execute(
+            sa.update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED)
+            .values(status=RUNNING, attempts=Job.attempts + 1, claimed_at=now)).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+        # Another worker got it first, try the next one
+
+
+def _retry_or_fail(entry, error):
+    """Queue entry's next attempt after a backoff, or fail it if it has
+    used them all.
+    """
+    entry.last_error = error
+    if entry.attempts >= entry.max_attempts:
+        entry.status = FAILED
+        entry.finished = datetime.now(timezone.utc)
+        current_app.logger.error('Job %s (%s) failed for good', entry.id, entry.kind)
+    else:
+        entry.status = QUEUED
+        entry.run_after = datetime.now(timezone.utc) + \
+            timedelta(seconds=backoff(entry.attempts))
+
+
+def _settle(entry):
+    """Release the unique key of a job that is done or failed, and queue
+    the next run of a periodic one.
+    """
+    if entry.status == QUEUED:
+        return
+    entry.unique_key = None
+    if entry.kind in periodic:
+        # Free the key before the next run takes it.  A run queued without
+        # one (before keys existed) ends its chain here if another run
+        # already holds it.
+        db.session.flush()
+        held = db.session.scalar(sa.select(Job.id).where(Job.unique_key == entry.kind))
+        if held is None:
+            enqueue(entry.kind, delay=interval(entry.kind))
+
+
+def run_job(entry):
+    handler = handlers.get(entry.kind)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler for job kind {entry.kind!r}')
+        handler(**json.loads(entry.payload))
+    except Exception:
+        db.session.rollback()
+        entry = db.session.get(Job, entry.id)
+        _retry_or_fail(entry, traceback.format_exc(limit=5))
+    else:
+        entry.status = DONE
+        entry.finished = datetime.now(timezone.utc)
+        entry.last_error = None
+    _settle(entry)
+    db.session.commit()
+    return entry.status
+
+
+def requeue_expired():
+    """Retry (or fail) the jobs whose lease has run out: those claimed more
+    than JOB_LEASE_TIMEOUT seconds ago and still running, because their
+    worker died or was killed mid-job.  The lost run counts as an attempt.
+    Returns how many there were.
+    """
+    cutoff = datetime.now(timezone.utc) - \
+        timedelta(seconds=current_app.config['JOB_LEASE_TIMEOUT'])
+    expired = db.session.scalars(
+        sa.select(Job).where(Job.status == RUNNING, Job.claimed_at < cutoff)).all()
+    for entry in expired:
+        # Only if still expired, another worker may have got it first
+        requeued = db.session.execute(
+            sa.update(Job)
+            .where(Job.id == entry.id, Job.status == RUNNING, Job.claimed_at < cutoff)
+            .values(status=QUEUED)
+            .execution_options(synchronize_session=False)).rowcount
+        if requeued:
+            db.session.refresh(entry)
+            _retry_or_fail(entry, 'Lease expired: the job was still running '
+                                  f'{current_app.config["JOB_LEASE_TIMEOUT"]} s after it was claimed')
+            _settle(entry)
+        db.session.commit()
+    if not expired:
+        db.session.rollback()
+    return len(expired)
+
+
+def schedule_periodic():
+    """Queue a run of every periodic job kind that has none pending.
+
+    Each worker process does this when it starts; the unique key makes
+    all but one of them lose the race for each kind.
+    """
+    for kind in periodic:
+        pending = db.session.scalar(
+            sa.select(Job.id).where(Job.kind == kind,
+                                    Job.status.in_([QUEUED, RUNNING])).limit(1))
+        if pending is None:
+            enqueue(kind)
+            try:
+                db.session.commit()
+            except sa.exc.IntegrityError:
+                # Another process queued it first
+                db.session.rollback()
+    db.session.commit()
+
+
+def run_pending(limit=None):
+    """Run due jobs in the calling thread until none are left (or limit)."""
+    requeue_expired()
+    count = 0
+    while limit is None or count < limit:
+        entry = claim()
+        if entry is None:
+            break
+        run_job(entry)
+        count += 1
+    return count
+
+
+def _worker_loop(app, first):
+    if first:
+        try:
+            with app.app_context():
+                schedule_periodic()
+        except Exception:
+            app.logger.exception('Could not schedule periodic jobs')
+    while True:
+        _wake.wait(app.config['JOB_POLL_INTERVAL'])
+        _wake.clear()
+        try:
+            with app.app_context():
+                run_pending()
+        except Exception:
+            app.logger.exception('Job worker crashed, restarting loop')
+
+
+def start_workers():
+    """Start the JOB_WORKERS background threads once per process."""
+    if _workers or current_app.config['JOB_WORKERS'] <= 0:
+        return
+    app = current_app._get_current_object()
+    with _start_lock:
+        if _workers:
+            return
+        for n in range(app.config['JOB_WORKERS']):
+            worker = threading.Thread(target=_worker_loop, args=(app, n == 0),
+                                      daemon=True, name=f'job-worker-{n}')
+            worker.start()
+            _workers.append(worker)
+
+
+def init_app(app):
+    # Periodic jobs need workers even before anything is enqueued
+    app.before_request(start_workers)
+
+
+def job_to_dict(entry):
+    return {
+        'id': entry.id,
+        'kind': entry.kind,
+        'status': entry.status,
+        'attempts': entry.attempts,
+        'max_attempts': entry.max_attempts,
+        'run_after': entry.run_after.isoformat(),
+        'claimed_at': entry.claimed_at.isoformat() if entry.claimed_at else None,
+        'finished': entry.finished.isoformat() if entry.finished else None,
+        'last_error': entry.last_error,
+    }
+
+
+def queue_summary():
+    """Job counts per (kind, status), for the admin status endpoint."""
+    rows = db.session.execute(
+        sa.select(Job.kind, Job.status, sa.func.count())
+        .group_by(Job.kind, Job.status)).all()
+    summary = {}
+    for kind, status, count in rows:
+        summary.setdefault(kind, {})[status] = count
+    return summary
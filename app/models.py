@@ -2,10 +2,26 @@ from datetime import datetime, timezone
 from typing import Optional
 import sqlalchemy as sa
 import sqlalchemy.orm as so
-from app import db, login
-from werkzeug.security import generate_password_hash, check_password_hash
+from app import db
+from werkzeug.security import check_password_hash
 from flask_login import UserMixin
 from hashlib import md5
+from functools import lru_cache
+from flask import current_app, url_for
+from app.passwords import hash_password
+
+@lru_cache(maxsize=4096)
+def email_digest(email):
+    """Gravatar style MD5 of an email, memoized so rows don't rehash it."""
+    return md5(email.lower().encode('utf-8')).hexdigest()
+
+
+ROLES = {
+    -1 : 'Unverified User',
+    0 : 'Admin',
+    1 : 'Lecturer',
+    2 : 'Student'
+}
 
 class User(UserMixin, db.Model):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
@@ -34,13 +50,15 @@ class User(UserMixin, db.Model):
         return '<User {}>'.format(self.username)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
     def avatar(self, size):
-        digest = md5(self.email.lower().encode('utf-8')).hexdigest()
+        digest = email_digest(self.email)
+        if current_app.config['AVATAR_MODE'] == 'local':
+            return url_for('files.avatar', digest=digest, size=size)
         return f'https://www.gravatar.com/avatar/{digest}?d=identicon&s={size}'
     
     def set_role(self, role):
@@ -57,22 +75,19 @@ class User(UserMixin, db.Model):
         return self.role == 2
 
     def get_role(self):
-        roles = {
-            -1 : 'Unverified User',
-            0 : 'Admin',
-            1 : 'Lecturer',
-            2 : 'Student'
-        }
-        return roles.get(self.role)
+        return ROLES.get(self.role)
 
 
 class Post(db.Model):
+    __table_args__ = (
+        sa.Index('ix_post_user_timestamp', 'user_id', 'timestamp'),
+    )
+
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     body: so.Mapped[str] = so.mapped_column(sa.String(140))
     timestamp: so.Mapped[datetime] = so.mapped_column(
         index=True, default=lambda: datetime.now(timezone.utc))
-    user_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(User.id),
-                                               index=True)
+    user_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(User.id))
 
     author: so.Mapped[User] = so.relationship(back_populates='posts')
 
@@ -82,7 +97,16 @@ class Post(db.Model):
     def get_ftime(self):
         return self.timestamp.strftime("%H:%M %d/%m/%y")
 
+# File.kind: shared on the board, or the upload behind a submission
+FILE_SHARED = 'shared'
+FILE_SUBMISSION = 'submission'
+
 class File(db.Model):
+    __table_args__ = (
+        # The board: one kind, newest first
+        sa.Index('ix_file_kind_timestamp', 'kind', 'timestamp'),
+    )
+
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     filename: so.Mapped[str] = so.mapped_column(sa.String(140))
     timestamp: so.Mapped[datetime] = so.mapped_column(
@@ -99,6 +123,12 @@ class File(db.Model):
 
     submissions: so.Mapped['Submission'] = so.relationship(back_populates='file')
 
+    content_hash: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64), index=True, nullable=True)
+
+    # Kept in step with submission.file_id by the Submission events below
+    kind: so.Mapped[str] = so.mapped_column(sa.String(16), default=FILE_SHARED,
+                                            server_default=FILE_SHARED)
+
     def __repr__(self):
         return f'<File {self.filename}> {self.title} {self.description}'
     
@@ -118,10 +148,17 @@ class Assignment(db.Model):
 
     submissions: so.Mapped['Submission'] = so.relationship(back_populates='assignment')
 
+    stats: so.Mapped[Optional['AssignmentStats']] = so.relationship(back_populates='assignment')
+
     def __repr__(self):
         return f'<Assignment {self.title}> {self.description} '
     
 class Submission(db.Model):
+    __table_args__ = (
+        # One submission per student and assignment
+        sa.Index('ix_submission_assignment_user', 'assignment_id', 'user_id', unique=True),
+    )
+
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     title: so.Mapped[str] = so.mapped_column(sa.String(140))
     description: so.Mapped[str] = so.mapped_column(sa.String(140))
@@ -131,8 +168,7 @@ class Submission(db.Model):
                                                index=True)
     file_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(File.id),
                                                index=True)
-    assignment_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(Assignment.id),
-                                               index=True)
+    assignment_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(Assignment.id))
 
     submitter: so.Mapped[User] = so.relationship(back_populates='submissions')
 
@@ -140,7 +176,7 @@ class Submission(db.Model):
 
     file: so.Mapped[File] = so.relationship(back_populates='submissions')
 
-    marks: so.Mapped[float] = so.mapped_column(sa.Float, index=False, unique=False, nullable=True, default=0)
+    marks: so.Mapped[Optional[float]] = so.mapped_column(sa.Float, index=False, unique=False, nullable=True)
 
     overdue: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False, nullable=True)
 
@@ -151,14 +187,103 @@ class Submission(db.Model):
     def set_marks(self, marks):
         self.marks = marks
         return
+
+
+def _set_file_kind(connection, file_id, kind):
+    if file_id is not None:
+        connection.execute(sa.update(File.__table__)
+                           .where(File.__table__.c.id == file_id)
+                           .values(kind=kind))
+
+@sa.event.listens_for(Submission, 'after_insert')
+def _submission_inserted(mapper, connection, target):
+    _set_file_kind(connection, target.file_id, FILE_SUBMISSION)
+
+@sa.event.listens_for(Submission, 'after_update')
+def _submission_updated(mapper, connection, target):
+    history = sa.inspect(target).attrs.file_id.history
+    if history.has_changes():
+        for file_id in history.deleted:
+            _set_file_kind(connection, file_id, FILE_SHARED)
+        _set_file_kind(connection, target.file_id, FILE_SUBMISSION)
+
+@sa.event.listens_for(Submission, 'after_delete')
+def _submission_deleted(mapper, connection, target):
+    _set_file_kind(connection, target.file_id, FILE_SHARED)
     
-    def check_overdue(self):
-        if self.assignment.duedate is None:
-            return
-        self.overdue = self.timestamp > self.assignment.duedate
-        return
+class AssignmentStats(db.Model):
+    """Summary of the submissions to one assignment, kept up to date as
+    submissions change (see app/stats.py) so pages never aggregate them.
+    """
+    assignment_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey(Assignment.id),
+                                                     primary_key=True)
+    submissions: so.Mapped[int] = so.mapped_column(default=0)
+    graded: so.Mapped[int] = so.mapped_column(default=0)
+    overdue: so.Mapped[int] = so.mapped_column(default=0)
+    mean: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    minimum: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    p25: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    median: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    p75: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    p90: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    maximum: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    updated: so.Mapped[datetime] = so.mapped_column(
+        default=lambda: datetime.now(timezone.utc))
 
-@login.user_loader
-def load_user(id):
-    return db.session.get(User, int(id))
+    assignment: so.Mapped[Assignment] = so.relationship(back_populates='stats')
 
+    def __repr__(self):
+        return f'<AssignmentStats {self.assignment_id}>'
+
+    def submission_rate(self, students):
+        return self.submissions / students if students else 0.0
+
+
+class Job(db.Model):
+    __table_args__ = (
+        # claim(): the oldest due job of those queued
+        sa.Index('ix_job_status_run_after', 'status', 'run_after'),
+        # At most one queued or running job per key (see jobs.enqueue)
+        sa.Index('ix_job_unique_key', 'unique_key', unique=True),
+    )
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    kind: so.Mapped[str] = so.mapped_column(sa.String(64), index=True)
+    payload: so.Mapped[str] = so.mapped_column(sa.Text, default='{}')
+    status: so.Mapped[str] = so.mapped_column(sa.String(16), default='queued')
+    attempts: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)
+    max_attempts: so.Mapped[int] = so.mapped_column(sa.Integer, default=5)
+    run_after: so.Mapped[datetime] = so.mapped_column(
+        index=True, default=lambda: datetime.now(timezone.utc))
+    timestamp: so.Mapped[datetime] = so.mapped_column(
+        default=lambda: datetime.now(timezone.utc))
+    claimed_at: so.Mapped[Optional[datetime]] = so.mapped_column(nullable=True)
+    finished: so.Mapped[Optional[datetime]] = so.mapped_column(nullable=True)
+    last_error: so.Mapped[Optional[str]] = so.mapped_column(sa.Text, nullable=True)
+    unique_key: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64), nullable=True)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+class AuditEvent(db.Model):
+    __table_args__ = (
+        sa.Index('ix_audit_event_action_timestamp', 'action', 'timestamp'),
+        sa.Index('ix_audit_event_actor_timestamp', 'actor_id', 'timestamp'),
+    )
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    timestamp: so.Mapped[datetime] = so.mapped_column(
+        index=True, default=lambda: datetime.now(timezone.utc))
+    actor_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey(User.id), nullable=True)
+    action: so.Mapped[str] = so.mapped_column(sa.String(64))
+    target_type: so.Mapped[Optional[str]] = so.mapped_column(sa.String(32), nullable=True)
+    target_id: so.Mapped[Optional[int]] = so.mapped_column(nullable=True)
+    details: so.Mapped[Optional[str]] = so.mapped_column(sa.String(255), nullable=True)
+
+    actor: so.Mapped[Optional[User]] = so.relationship()
+
+    def __repr__(self):
+        return f'<AuditEvent {self.action} {self.target_type} {self.target_id}>'
+
+    def get_ftime(self):
+        return self.timestamp.strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from werkzeug.security import generate_password_hash, check_password_hash
+from flask import current_app
+
+# Password hashing is deliberately slow, so it runs on a few dedicated
+# threads; a burst of logins then queues here instead of taking every core
+# away from the other routes.
+_pool = None
+
+
+def init_app(app):
+    global _pool
+    _pool = ThreadPoolExecutor(app.config['PASSWORD_HASH_WORKERS'],
+                               thread_name_prefix='password-hash')
+
+
+def hash_password(password, method=None):
+    """Hash password with the configured PASSWORD_HASH_METHOD."""
+    return generate_password_hash(password,
+                                  method or current_app.config['PASSWORD_HASH_METHOD'])
+
+
+@lru_cache(16)
+def policy_prefix(method):
+    """The method string a hash made with method starts with, with the
+    defaults filled in, e.g. 'pbkdf2' -> 'pbkdf2:sha256:600000'.
+    """
+    return generate_password_hash('', method, salt_length=1).split('$', 1)[0]
+
+
+def needs_rehash(password_hash, method=None):
+    """True if password_hash was made with another method or cost."""
+    method = method or current_app.config['PASSWORD_HASH_METHOD']
+    return password_hash.split('$', 1)[0] != policy_prefix(method)
+
+
+def _verify(password_hash, password, method):
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if needs_rehash(password_hash, method):
+        return True, hash_password(password, method)
+    return True, None
+
+
+def verify(user, password):
+    """Check user's password on the hashing pool.
+
+    After a successful check, a hash made under an older policy is
+    replaced with one made under the current policy (stronger or cheaper).
+    The caller commits the session.
+    """
+    if not user.password_hash:
+        return False
+    ok, new_hash = _pool.submit(_verify, user.password_hash, password,
+                                current_app.config['PASSWORD_HASH_METHOD']).result()
+    if new_hash is not None:
+        user.password_hash = new_hash
+    return ok
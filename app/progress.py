@@ -0,0 +1,96 @@
+from dataclasses import dataclass, field
+import sqlalchemy as sa
+from app import db
+from app.models import User, Assignment, Submission
+
+# Cell states stored in ProgressMatrix.status
+NOT_SUBMITTED = 0
+SUBMITTED = 1
+OVERDUE = 2
+
+
+@dataclass
+class ProgressMatrix:
+    """Dense student x assignment grid.
+
+    Row i belongs to students[i], column j to assignments[j].  status[i][j]
+    is one of NOT_SUBMITTED / SUBMITTED / OVERDUE and marks[i][j] holds the
+    marks of that submission (None when not submitted or not graded).
+    """
+    students: list
+    assignments: list
+    status: list = field(default_factory=list)
+    marks: list = field(default_factory=list)
+
+    def submitted(self, i, j):
+        return self.status[i][j] != NOT_SUBMITTED
+
+    def overdue(self, i, j):
+        return self.status[i][j] == OVERDUE
+
+    def row(self, i):
+        """Cells of row i as (assignment, status, marks) tuples."""
+        return zip(self.assignments, self.status[i], self.marks[i])
+
+
+def progress_rows(assignments, student_filter=None, yield_per=None):
+    """Yield (student, status, marks) for each student, ordered by username.
+
+    status and marks are one row of the grid over assignments (see
+    ProgressMatrix).  Students come from a single query of every student
+    outer-joined with the few submission columns the grid needs; rows are
+    grouped as they arrive, so with yield_per the query is read in batches
+    and only one student's row is held at a time.  By default the students
+    are all users with role 2; pass a where-clause on User as
+    student_filter to restrict them, e.g. to a single user.
+    """
+    if student_filter is None:
+        student_filter = User.role == 2
+    column = {assignment.id: j for j, assignment in enumerate(assignments)}
+
+    query = (sa.select(User, Submission.assignment_id, Submission.marks,
+                       Submission.overdue)
+             .outerjoin(Submission, Submission.user_id == User.id)
+             .where(student_filter)
+             .order_by(User.username, User.id, Submission.id))
+    if yield_per:
+        query = query.execution_options(yield_per=yield_per)
+
+    current = None
+    for user, assignment_id, marks, overdue in db.session.execute(query):
+        if current is None or current[0].id != user.id:
+            if current is not None:
+                yield current
+            current = (user, bytearray(len(assignments)), [None] * len(assignments))
+        j = column.get(assignment_id)
+        # Keep the first submission per cell, like the old .first() lookup
+        if j is None or current[1][j] != NOT_SUBMITTED:
+            continue
+        current[1][j] = OVERDUE if overdue else SUBMITTED
+        current[2][j] = marks
+    if current is not None:
+        yield current
+
+
+def progress_assignments():
+    """The grid's columns: every assignment, oldest first."""
+    return db.session.scalars(sa.select(Assignment).order_by(Assignment.id)).all()
+
+
+def build_progress_matrix(student_filter=None):
+    """Build the progress grid with two queries regardless of cohort size:
+    one for the assignments (the columns) and one for the students (see
+    progress_rows).
+    """
+    assignments = progress_assignments()
+    matrix = ProgressMatrix(students=[], assignments=assignments)
+    for user, status, marks in progress_rows(assignments, student_filter):
+        matrix.students.append(user)
+        matrix.status.append(status)
+        matrix.marks.append(marks)
+    return matrix
+
+
+def build_student_progress(user):
+    """Single-row matrix for one user, built by the same engine."""
+    return build_progress_matrix(User.id == user.id)
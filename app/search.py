@@ -0,0 +1,246 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app, url_for
+from markupsafe import Markup, escape
+from app import db
+from app.models import Post, File, Assignment, Submission
+
+# One FTS5 table indexes every searchable row.  Its rowid packs the row's
+# kind into the low two bits (rowid = id * 4 + kind), so a hit needs no
+# extra columns and a row is found again by rowid when it changes.
+KINDS = ['post', 'file', 'assignment', 'submission']
+MODELS = {'post': Post, 'file': File, 'assignment': Assignment,
+          'submission': Submission}
+_SOURCES = {
+    # kind: (table, title column, body column)
+    'post': ('post', 'NULL', 'body'),
+    'file': ('file', 'title', 'description'),
+    'assignment': ('assignment', 'title', 'description'),
+    'submission': ('submission', 'title', 'description'),
+}
+
+
+def _schema():
+    statements = [
+        "CREATE VIRTUAL TABLE search_index USING fts5("
+        "title, body, tokenize='porter unicode61', prefix='2 3')",
+        # Title matches count ten times as much as body matches
+        "INSERT INTO search_index(search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    ]
+    for code, kind in enumerate(KINDS):
+        table, title, body = _SOURCES[kind]
+        new_title = 'NULL' if title == 'NULL' else f'new.{title}'
+        changed = body if title == 'NULL' else f'{title}, {body}'
+        statements += [
+            f"CREATE TRIGGER search_{table}_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_index(rowid, title, body) "
+            f"VALUES (new.id * 4 + {code}, {new_title}, new.{body}); END",
+            f"CREATE TRIGGER search_{table}_update AFTER UPDATE OF {changed} ON {table} BEGIN "
+            f"UPDATE search_index SET title = {new_title}, body = new.{body} "
+            f"WHERE rowid = new.id * 4 + {code}; END",
+            f"CREATE TRIGGER search_{table}_delete AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.id * 4 + {code}; END",
+        ]
+    return statements
+
+
+SCHEMA = _schema()
+
+
+@sa.event.listens_for(db.metadata, 'after_create')
+def _create_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in SCHEMA:
+            connection.exec_driver_sql(statement)
+
+
+@sa.event.listens_for(db.metadata, 'before_drop')
+def _drop_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS search_index')
+
+
+def match_query(text):
+    """FTS5 query for free text: every word must match (after stemming),
+    and a word ending in * matches as a prefix.  Returns None if the text
+    has no words.
+    """
+    words = re.findall(r'(\w+)(\*?)', text or '')
+    if not words:
+        return None
+    return ' '.join(f'"{word}"{star}' for word, star in words)
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    id: int
+    title: str
+    snippet: Markup
+    url: str
+    timestamp: Optional[datetime] = None
+
+
+@dataclass
+class SearchPage:
+    hits: list
+    page: int
+    has_next: bool
+
+
+def _snippet(text):
+    # snippet() marks matches with \x02/\x03 so the stored text can be
+    # escaped before the markers become <mark> tags
+    return Markup(str(escape(text or '')).replace('\x02', '<mark>')
+                  .replace('\x03', '</mark>'))
+
+
+def _visible_to(user):
+    """SQL restricting hits to what user may open: teachers see all,
+    students only their own submissions and submitted files.
+    """
+    if user.is_admin() or user.is_lecturer():
+        return sa.true()
+    rowid = sa.literal_column('search_index.rowid', sa.Integer)
+    own = sa.select(Submission.id).where(Submission.user_id == user.id)
+    # Correlated on file_id, so each file hit is one index lookup
+    others_file = sa.exists().where(Submission.file_id == rowid // 4,
+                                    Submission.user_id != user.id)
+    return sa.and_(
+        sa.or_(rowid % 4 != 3, (rowid // 4).in_(own)),
+        sa.or_(rowid % 4 != 1, ~others_file))
+
+
+def _load(kind, ids):
+    model = MODELS[kind]
+    query = sa.select(model).where(model.id.in_(ids))
+    if model is Post:
+        query = query.options(so.joinedload(Post.author))
+    return {row.id: row for row in db.session.scalars(query)}
+
+
+def _hit(kind, row, snippet):
+    if kind == 'post':
+        return SearchHit(kind, row.id, row.author.username, snippet,
+                         url_for('auth.user', username=row.author.username), row.timestamp)
+    if kind == 'file':
+        return SearchHit(kind, row.id, row.title, snippet,
+                         url_for('files.details', fileid=row.id), row.timestamp)
+    if kind == 'assignment':
+        return SearchHit(kind, row.id, row.title, snippet,
+                         url_for('assignments.detailsAssignment', assignmentid=row.id), row.timestamp)
+    return SearchHit(kind, row.id, row.title, snippet,
+                     url_for('files.details', fileid=row.file_id), row.timestamp)
+
+
+def _matching(query):
+    return sa.literal_column('search_index').op('MATCH')(query)
+
+
+def _highlight(text, words):
+    pattern = re.compile('|'.join(re.escape(word) for word in words), re.IGNORECASE)
+    return pattern.sub(lambda match: f'\x02{match.group()}\x03', text or '')
+
+
+def _substring_search(words, user, page, per_page):
+    """Fallback for databases without FTS5, e.g. PostgreSQL: rows that
+    contain every word (case-insensitively, no stemming), newest first.
+    """
+    teacher = user.is_admin() or user.is_lecturer()
+    selects = []
+    for code, kind in enumerate(KINDS):
+        model = MODELS[kind]
+        columns = [model.body] if model is Post else [model.title, model.description]
+        query = sa.select(sa.literal(code).label('kind'), model.id, model.timestamp).where(
+            *(sa.or_(*(column.icontains(word, autoescape=True) for column in columns))
+              for word in words))
+        if kind == 'submission' and not teacher:
+            query = query.where(Submission.user_id == user.id)
+        if kind == 'file' and not teacher:
+            query = query.where(~sa.exists().where(Submission.file_id == File.id,
+                                                   Submission.user_id != user.id))
+        selects.append(query)
+    found = sa.union_all(*selects).subquery()
+    matches = db.session.execute(
+        sa.select(found.c.kind, found.c.id)
+        .order_by(found.c.timestamp.desc(), found.c.id.desc())
+        .limit(per_page + 1).offset((page - 1) * per_page)).all()
+    has_next = len(matches) > per_page
+    matches = matches[:per_page]
+
+    ids = {}
+    for code, ident in matches:
+        ids.setdefault(KINDS[code], []).append(ident)
+    rows = {kind: _load(kind, kind_ids) for kind, kind_ids in ids.items()}
+    hits = []
+    for code, ident in matches:
+        kind = KINDS[code]
+        row = rows[kind].get(ident)
+        if row is not None:
+            text = row.body if kind == 'post' else row.description
+            hits.append(_hit(kind, row, _snippet(_highlight(text, words))))
+    return SearchPage(hits=hits, page=page, has_next=has_next)
+
+
+def search(text, user, page=1, per_page=20, window=None):
+    """One page of rows matching text, best first, that user may see.
+
+    BM25 has to score every match before it can sort, so a word found in
+    most rows would cost time in proportion to the table; only the newest
+    `window` matches user may see (the SEARCH_RANK_WINDOW setting, shared
+    equally by the kinds) are ranked, which FTS5 finds by walking its
+    index in rowid order, one query per kind.  The page's rows are then
+    loaded with one query per kind.  Other databases than SQLite have no
+    FTS5 index and fall back to a substring search.
+    """
+    query = match_query(text)
+    if query is None:
+        return SearchPage(hits=[], page=page, has_next=False)
+    if db.engine.dialect.name != 'sqlite':
+        return _substring_search([word for word, _ in re.findall(r'(\w+)(\*?)', text)],
+                                 user, page, per_page)
+    window = window or current_app.config['SEARCH_RANK_WINDOW']
+    rowid = sa.literal_column('search_index.rowid', sa.Integer)
+    # Rowids only order rows of the same kind by age (id * 4 + kind), so
+    # each kind's newest matches are taken separately, and ranked together:
+    # BM25 scores with statistics of the whole index, so they compare
+    found = []
+    for code in range(len(KINDS)):
+        found += db.session.execute(
+            sa.select(rowid, sa.literal_column('rank'), sa.literal_column(
+                "snippet(search_index, -1, char(2), char(3), '…', 16)"))
+            .select_from(sa.table('search_index'))
+            .where(_matching(query), rowid % 4 == code, _visible_to(user))
+            .order_by(rowid.desc())
+            .limit(max(1, window // len(KINDS)))).all()
+    found.sort(key=lambda match: (match[1], -match[0]))
+    start = (page - 1) * per_page
+    has_next = len(found) > start + per_page
+    matches = [(rowid, snippet) for rowid, _, snippet in found[start:start + per_page]]
+
+    ids = {}
+    for rowid, _ in matches:
+        ids.setdefault(KINDS[rowid % 4], []).append(rowid // 4)
+    rows = {kind: _load(kind, kind_ids) for kind, kind_ids in ids.items()}
+    hits = []
+    for rowid, snippet in matches:
+        kind = KINDS[rowid % 4]
+        row = rows[kind].get(rowid // 4)
+        if row is not None:
+            hits.append(_hit(kind, row, _snippet(snippet)))
+    return SearchPage(hits=hits, page=page, has_next=has_next)
+
+
+def hit_to_dict(hit):
+    return {
+        'kind': hit.kind,
+        'id': hit.id,
+        'title': hit.title,
+        'snippet': str(hit.snippet),
+        'url': hit.url,
+        'timestamp': hit.timestamp.isoformat() if hit.timestamp else None,
+    }
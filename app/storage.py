@@ -0,0 +1,176 @@
+import glob
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+import sqlalchemy as sa
+from flask import abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+from app import db
+from app.jobs import job
+from app.models import File
+
+BLOB_NAME = re.compile(r'^([0-9a-f]{64})(-\w+)?(\.\w+)?$')
+
+
+@dataclass
+class StoredBlob:
+    digest: str
+    filename: str
+    size: int
+    created: bool
+
+    @property
+    def path(self):
+        """Path stored on File rows, served by the /uploads route."""
+        return 'uploads/' + self.filename
+
+
+def blob_filename(digest, original_name):
+    """Content-addressed name: the SHA-256 digest plus the original extension."""
+    ext = os.path.splitext(original_name)[1].lower()
+    return digest + ext
+
+
+def store_upload(stream, original_name):
+    """Copy an uploaded file into UPLOAD_FOLDER under its content hash.
+
+    The stream is read in UPLOAD_CHUNK_SIZE pieces which are hashed and
+    written to a temp file in the upload folder as they arrive, so memory
+    use is bounded by the chunk size whatever the file size.  The temp file
+    is then renamed to its content-addressed name; if a blob with the same
+    content already exists the temp file is dropped instead, and the blob
+    touched so sweep_blobs() leaves it alone until this upload commits.
+    """
+    folder = current_app.config['UPLOAD_FOLDER']
+    chunk_size = current_app.config['UPLOAD_CHUNK_SIZE']
+    os.makedirs(folder, exist_ok=True)
+
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                sha.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+
+        digest = sha.hexdigest()
+        filename = blob_filename(digest, original_name)
+        target = os.path.join(folder, filename)
+        created = not os.path.exists(target)
+        if created:
+            os.replace(tmp_path, target)
+        else:
+            os.remove(tmp_path)
+            os.utime(target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StoredBlob(digest=digest, filename=filename, size=size,
+                      created=created)
+
+
+
+def blob_digest(filename):
+    """The content hash encoded in a blob (or blob derivative) filename,
+    or None for legacy files."""
+    match = BLOB_NAME.match(filename)
+    return match.group(1) if match else None
+
+
+def send_blob(filename, folder=None):
+    """Serve an uploaded file so browsers and proxies can skip the bytes.
+
+    Content-addressed blobs get their SHA-256 as a strong ETag and are
+    cached privately for UPLOAD_CACHE_MAX_AGE as immutable, since a name
+    can never point at different content (the same holds for their
+    derivatives, whose names start with the hash).  Legacy files named after their
+    upload keep Werkzeug's mtime based ETag and are revalidated on each
+    use.  Either way If-None-Match is answered with 304 and Range requests
+    with 206.
+
+    With USE_X_SENDFILE the body is handed to the front server through
+    X-Sendfile (handled by Flask), and with UPLOAD_ACCEL_REDIRECT set to an
+    internal nginx location the response only carries X-Accel-Redirect.
+    """
+    folder = folder or current_app.config['UPLOAD_FOLDER']
+    digest = blob_digest(filename)
+    # Derivatives share the hash of their original, so key on the whole stem
+    etag = os.path.splitext(filename)[0] if digest else None
+    accel = current_app.config['UPLOAD_ACCEL_REDIRECT']
+    if accel:
+        path = safe_join(folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        internal = os.path.relpath(path, current_app.config['UPLOAD_FOLDER'])
+        response.headers['X-Accel-Redirect'] = accel.rstrip('/') + '/' + \
+            internal.replace(os.sep, '/')
+        if etag is None:
+            stat = os.stat(path)
+            etag = f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+        response.set_etag(etag)
+        response.make_conditional(request)
+    else:
+        response = send_from_directory(folder, filename, etag=etag or True)
+
+    response.cache_control.private = True
+    if digest:
+        response.cache_control.no_cache = None
+        response.cache_control.max_age = current_app.config['UPLOAD_CACHE_MAX_AGE']
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+@job('blobs.sweep', every='BLOB_SWEEP_INTERVAL')
+def sweep_blobs():
+    """Delete the blobs (and their derivatives) no File row points at:
+    those of deleted files and of uploads that ended up unused, e.g. a
+    duplicate or a submission that lost a race.
+
+    Requests never delete blobs themselves: two uploads of the same bytes
+    share one, and neither can see whether the other will commit.  Blobs
+    written or reused in the last BLOB_GRACE_PERIOD seconds are skipped,
+    as their upload may not have committed yet.
+    """
+    from app.thumbnails import derivatives_folder
+
+    folder = current_app.config['UPLOAD_FOLDER']
+    cutoff = time.time() - current_app.config['BLOB_GRACE_PERIOD']
+    if not os.path.isdir(folder):
+        return 0
+    candidates = {}
+    for entry in os.scandir(folder):
+        match = BLOB_NAME.match(entry.name)
+        if match and not match.group(2) and entry.is_file() and entry.stat().st_mtime < cutoff:
+            candidates.setdefault(match.group(1), []).append(entry.path)
+    digests = list(candidates)
+    removed = 0
+    for start in range(0, len(digests), 500):
+        batch = digests[start:start + 500]
+        used = set(db.session.scalars(
+            sa.select(File.content_hash).where(File.content_hash.in_(batch))))
+        for digest in batch:
+            paths = candidates[digest]
+            # Skip blobs reused by an upload since they were listed
+            if digest in used or any(os.stat(path).st_mtime >= cutoff for path in paths):
+                continue
+            for path in paths + glob.glob(os.path.join(derivatives_folder(), digest + '-*')):
+                os.remove(path)
+            removed += 1
+    db.session.rollback()
+    if removed:
+        current_app.logger.info('Blob sweep deleted %s unused blobs', removed)
+    return removed
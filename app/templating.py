@@ -0,0 +1,50 @@
+import os
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_app(app):
+    """Keep compiled templates in TEMPLATE_CACHE_DIR, so a new worker loads
+    them instead of parsing and compiling every template again.
+
+    Entries are keyed by template path and checked against a hash of the
+    source when loaded, so an edited template is recompiled rather than
+    served stale.  With TEMPLATES_AUTO_RELOAD off (production), a worker
+    never rechecks a template it has loaded; a deploy restarts workers.
+    """
+    folder = app.config['TEMPLATE_CACHE_DIR']
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(folder)
+    app.cli.add_command(compile_templates_command)
+
+
+def compile_templates(clear=False):
+    """Compile every template into the bytecode cache, returning how many
+    were compiled.  Templates already cached with the same source are
+    left alone.
+    """
+    env = current_app.jinja_env
+    if clear:
+        env.bytecode_cache.clear()
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+@click.command('compile-templates')
+@click.option('--clear', is_flag=True, help='Empty the cache first.')
+@with_appcontext
+def compile_templates_command(clear):
+    """Precompile app/templates into the template bytecode cache."""
+    if current_app.jinja_env.bytecode_cache is None:
+        raise click.ClickException('TEMPLATE_CACHE_DIR is not set')
+    start = time.perf_counter()
+    count = compile_templates(clear)
+    print('Compiled {} templates into {} in {:.2f}s'.format(
+        count, current_app.config['TEMPLATE_CACHE_DIR'],
+        time.perf_counter() - start))
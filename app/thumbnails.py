@@ -0,0 +1,100 @@
+import importlib.util
+import os
+import tempfile
+from flask import current_app, url_for
+from app.jobs import job, enqueue
+from app.storage import blob_digest
+
+# Pillow is optional, originals are served without it.  Only its presence
+# is checked here; it is imported where derivatives are rendered, so web
+# workers that never render one do not pay for loading it.
+HAVE_PILLOW = importlib.util.find_spec('PIL') is not None
+
+# Bounding box (in pixels) of each derivative size
+SIZES = {
+    'thumb': 128,
+    'medium': 480,
+    'web': 1280,
+}
+
+def derivatives_folder():
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'derivatives')
+
+
+def derivative_name(filename, size):
+    """<stem>-<size>.webp.  For content-addressed blobs the stem is the
+    hash; legacy uploads keep their extension in it, so photo.png and
+    photo.jpg do not share a derivative.
+    """
+    return '{}-{}.webp'.format(blob_digest(filename) or filename, size)
+
+
+def render_derivative(source, target, box):
+    """Write a downscaled WebP copy of source no larger than box x box."""
+    from PIL import Image
+    with Image.open(source) as image:
+        if image.format == 'JPEG':
+            # Let the decoder skip most of the pixels when shrinking a lot
+            image.draft('RGB', (box, box))
+        image.thumbnail((box, box), Image.LANCZOS, reducing_gap=3.0)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info
+                                  else 'RGB')
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target),
+                                        prefix='.derivative-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                image.save(out, 'WEBP', quality=80, method=4)
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def generate_derivative(filename, size):
+    """Make sure the size derivative of an upload exists, returning its name.
+
+    Returns None when Pillow is missing or the upload is not a readable
+    image, in which case callers fall back to the original.
+    """
+    if not HAVE_PILLOW or size not in SIZES:
+        return None
+    from PIL import Image
+    folder = derivatives_folder()
+    name = derivative_name(filename, size)
+    target = os.path.join(folder, name)
+    if not os.path.exists(target):
+        source = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        os.makedirs(folder, exist_ok=True)
+        try:
+            render_derivative(source, target, SIZES[size])
+        except (OSError, Image.DecompressionBombError, ValueError):
+            current_app.logger.warning('Could not make %s derivative of %s',
+                                       size, filename)
+            return None
+    return name
+
+
+@job('derivatives')
+def generate_all(filename):
+    for size in SIZES:
+        generate_derivative(filename, size)
+
+
+def schedule_derivatives(file):
+    """Queue rendering every derivative of a new File on the job workers."""
+    if not HAVE_PILLOW:
+        return None
+    return enqueue('derivatives', filename=os.path.basename(file.path))
+
+
+def image_url(file, size):
+    """URL of the size derivative of a File, or of the original without Pillow."""
+    filename = os.path.basename(file.path)
+    if not HAVE_PILLOW:
+        return url_for('files.uploaded_file', filename=filename)
+    return url_for('files.uploaded_derivative', size=size, filename=filename)
+
+
+def init_app(app):
+    app.add_template_global(image_url)
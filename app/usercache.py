@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from flask import current_app
+from app import db, login
+from app.models import User
+
+_COLUMNS = [column.key for column in sa.inspect(User).column_attrs]
+
+
+class UserCache:
+    """Column values of recently seen users, each kept for ttl seconds.
+
+    Flask-Login already loads the user at most once per request; this
+    saves the SELECT across requests.  Entries are dropped as soon as a
+    User row is updated or deleted in this process, and the TTL bounds
+    how long a change made by another process can go unseen.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ident):
+        with self._lock:
+            entry = self._entries.get(ident)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < time.monotonic():
+                del self._entries[ident]
+                return None
+            self._entries.move_to_end(ident)
+            return values
+
+    def set(self, ident, values):
+        with self._lock:
+            self._entries[ident] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(ident)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, ident):
+        with self._lock:
+            self._entries.pop(ident, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Sized from the config by init_app
+cache = UserCache(0, 0)
+
+
+def init_app(app):
+    cache.ttl = app.config['USER_CACHE_TTL']
+    cache.max_entries = app.config['USER_CACHE_ENTRIES']
+
+
+@login.user_loader
+def load_user(id):
+    ident = int(id)
+    if not current_app.config['USER_CACHE_TTL']:
+        return db.session.get(User, ident)
+    values = cache.get(ident)
+    if values is None:
+        user = db.session.get(User, ident)
+        if user is not None:
+            cache.set(ident, {key: getattr(user, key) for key in _COLUMNS})
+        return user
+    # Attach a copy of the cached row to this request's session without
+    # a SELECT, so it behaves like a loaded User (relationships, updates)
+    user = User(**values)
+    so.make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+@sa.event.listens_for(User, 'after_update')
+@sa.event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    # Evict at flush so this process sees the change right away, and again
+    # after commit in case another request cached the old row in between
+    cache.evict(target.id)
+    so.object_session(target).info.setdefault('_changed_users', set()).add(target.id)
+
+
+@sa.event.listens_for(so.Session, 'after_commit')
+def _evict_committed(session):
+    for ident in session.info.pop('_changed_users', ()):
+        cache.evict(ident)
+
+
+@sa.event.listens_for(so.Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop('_changed_users', None)
@@ -0,0 +1,10 @@
+# Contributors:
+#   Faris Imran bin Muhammmad Faisal - 1221304603
+#   Nurhakim bin Hasbi - 1211305696
+#   Muhammad Amir Faris Bin Ahsan Nudin - 1201103670
+#   Danial Syahmi bin Jani 1211307861
+
+# Each module holds one blueprint, named after the module.  create_app
+# imports and registers them, so importing the app package alone does not
+# load the views.
+BLUEPRINTS = ['auth', 'board', 'files', 'assignments', 'admin', 'progress']
@@ -0,0 +1,112 @@
+from flask import Blueprint, current_app, render_template, flash, redirect, url_for, request, abort, jsonify
+from flask_login import current_user, login_required
+import sqlalchemy as sa
+from datetime import datetime, timedelta, time
+from app import db, audit, fragments
+from app.models import Post, Job
+from app.jobs import job_to_dict, queue_summary
+from app.accounts import activity_counts, user_page
+from app.instrumentation import snapshot
+from app.forms import DeletePost, AuditFilterForm, UserFilterForm
+from app.views.board import board_feed
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/adminboard', methods=['GET', 'POST'])
+@login_required
+def adminboard():
+    if not current_user.is_admin():
+        return redirect(url_for('board.index'))
+    form = DeletePost()
+    if form.validate_on_submit():
+        post = db.session.scalar(sa.select(Post).where(form.post_ID.data == Post.id))
+        if post is None:
+            flash('Please enter an existing post ID')
+            return redirect(url_for('admin.adminboard'))
+        db.session.delete(post)
+        db.session.commit()
+        audit.record('post.delete', post, details=post.body)
+        flash('Deleted!')
+        return redirect(url_for('admin.adminboard'))
+    page = board_feed()
+    return render_template('adminboard.html',
+                            title='Discussion Board',
+                                posts=page.items,
+                                page=page,
+                                form = form)
+
+
+@bp.route('/auditlog', methods=['GET', 'POST'])
+@login_required
+def auditlog():
+    if not current_user.is_admin():
+        return redirect(url_for('board.index'))
+    form = AuditFilterForm(request.args)
+    form.action.choices = [('', 'Any action')] + [(key, label) for key, label in audit.ACTIONS.items()]
+    filters = {}
+    if form.validate():
+        filters = dict(actor=form.actor.data or None,
+                       action=form.action.data or None,
+                       since=datetime.combine(form.since.data, time.min) if form.since.data else None,
+                       until=datetime.combine(form.until.data + timedelta(days=1), time.min) if form.until.data else None)
+    try:
+        page = audit.audit_events(current_app.config['AUDIT_PER_PAGE'],
+                                  before=request.args.get('before'),
+                                  after=request.args.get('after'),
+                                  **filters)
+    except ValueError:
+        abort(400)
+    return render_template('auditlog.html', title='Audit Log', events=page.items,
+                           page=page, form=form, actions=audit.ACTIONS)
+
+
+@bp.route('/api/jobs')
+@login_required
+def jobs_api():
+    if not current_user.is_admin():
+        abort(403)
+    return jsonify(queue_summary())
+
+@bp.route('/api/jobs/<int:job_id>')
+@login_required
+def job_api(job_id):
+    if not (current_user.is_admin() or current_user.is_lecturer()):
+        abort(403)
+    entry = db.first_or_404(sa.select(Job).where(Job.id == job_id))
+    return jsonify(job_to_dict(entry))
+
+
+@bp.route('/admin/stats')
+@login_required
+def request_stats():
+    if not current_user.is_admin():
+        abort(403)
+    stats = snapshot()
+    stats['fragment_cache'] = {'entries': len(fragments.cache),
+                               'bytes': fragments.cache.size,
+                               'hits': fragments.cache.hits,
+                               'misses': fragments.cache.misses}
+    return jsonify(stats)
+
+
+@bp.route('/list')
+@login_required
+def list():
+    if not current_user.is_admin():
+        flash('Not authorized to access this page')
+        return redirect(url_for('board.index'))
+    form = UserFilterForm(request.args)
+    filters = {}
+    if form.validate():
+        filters = dict(role=int(form.role.data) if form.role.data else None,
+                       prefix=form.prefix.data or None)
+    try:
+        page = user_page(current_app.config['USERS_PER_PAGE'],
+                         before=request.args.get('before'),
+                         after=request.args.get('after'),
+                         **filters)
+    except ValueError:
+        abort(400)
+    return render_template('list.html', title='User List', users=page.items, page=page,
+                            form=form, counts=activity_counts([user.id for user in page.items]))
@@ -0,0 +1,150 @@
+from flask import Blueprint, render_template, flash, redirect, url_for, request, abort, jsonify
+from flask_login import current_user, login_required
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from datetime import datetime, timezone
+from werkzeug.utils import secure_filename
+from app import db, grading, stats
+from app.admission import rate_limit, upload_slot
+from app.models import File, Assignment, Submission
+from app.storage import store_upload
+from app.thumbnails import schedule_derivatives
+from app.forms import UploadForm, UploadButton, AssignmentForm, MarksImportForm
+
+bp = Blueprint('assignments', __name__)
+
+
+@bp.route('/assignments', methods=['GET', 'POST'])
+@login_required
+def assignments():
+    form = UploadButton()
+    if form.validate_on_submit():
+        return redirect(url_for('assignments.createAssignment'))
+    return render_template('assignments.html',
+                            title='Assignments',
+                              assignments=db.session.scalars(sa.select(Assignment)
+                                                             .options(so.joinedload(Assignment.stats), so.joinedload(Assignment.asmtauthor))
+                                                             .order_by(sa.desc(Assignment.timestamp))).all(),
+                                students=stats.student_count(),
+                                form=form)
+
+@bp.route('/detailsAssignment/<assignmentid>', methods=['GET', 'POST'])
+@login_required
+@rate_limit('submit')
+@upload_slot
+def detailsAssignment(assignmentid):
+    form = UploadForm()
+    assignment = db.session.scalar(sa.select(Assignment).where(Assignment.id == assignmentid))
+    submittedFile = None
+    if assignment is None:
+        flash('Assignment not found')
+        return redirect(url_for('assignments.assignments'))
+    
+    if current_user.is_student():
+        submission = db.session.scalar(sa.select(Submission).where(Submission.assignment_id == assignmentid, Submission.user_id == current_user.id))
+        if submission is not None:
+            submittedFile = db.session.scalar(sa.select(File).where(File.id == submission.file_id))
+    
+    if current_user.is_admin() or current_user.is_lecturer():
+        submittedFile = db.session.scalars(sa.select(File).join(File.submissions).options(so.joinedload(File.uploader)).where(Submission.assignment_id == assignmentid)).all()
+    
+    if form.validate_on_submit():
+        existing = db.session.scalar(sa.select(Submission.id).where(Submission.assignment_id == assignmentid, Submission.user_id == current_user.id))
+        if existing is not None:
+            flash('You have already submitted this assignment')
+            return redirect(url_for('assignments.detailsAssignment', assignmentid=assignmentid))
+
+        filename = secure_filename(form.file.data.filename)
+        blob = store_upload(form.file.data.stream, filename)
+        file = File(filename=filename,
+                    title = form.title.data,
+                      user_id=current_user.id,
+                        path=blob.path,
+                          content_hash=blob.digest,
+                          description=form.description.data,
+                            timestamp=datetime.now(timezone.utc))
+        now = datetime.now(timezone.utc)
+        submission = Submission(title=form.title.data,
+                                 description=form.description.data,
+                                   user_id=current_user.id,
+                                     file=file,
+                                       assignment_id=assignmentid,
+                                         timestamp=now,
+                                           overdue=grading.is_overdue(now, assignment.duedate),
+                                             marks=None)
+        db.session.add_all([file, submission])
+        # One flush assigns both ids, then everything commits together
+        try:
+            db.session.flush()
+        except sa.exc.IntegrityError:
+            db.session.rollback()
+            # Lost a race with another request submitting for the same
+            # student only if that submission is there now
+            existing = db.session.scalar(sa.select(Submission.id).where(Submission.assignment_id == assignmentid, Submission.user_id == current_user.id))
+            if existing is None:
+                raise
+            # The unused blob is left to sweep_blobs()
+            flash('You have already submitted this assignment')
+            return redirect(url_for('assignments.detailsAssignment', assignmentid=assignmentid))
+        schedule_derivatives(file)
+        db.session.commit()
+        flash('File uploaded!')
+        flash('Submitted!')
+        return redirect(url_for('assignments.detailsAssignment', assignmentid=assignmentid))
+    return render_template('detailsAssignment.html', title='Assignment Details', assignment=assignment, form=form, submittedFile=submittedFile,
+                           students=stats.student_count() if not current_user.is_student() else None)
+
+@bp.route('/createAssignment', methods=['GET', 'POST'])
+@login_required
+def createAssignment():
+    form = AssignmentForm()
+    if form.validate_on_submit():
+        assignment = Assignment(title=form.title.data,
+                                 description=form.description.data,
+                                   user_id=current_user.id,
+                                     duedate=form.duration.data,
+                                       totalMarks=form.marks.data
+        )
+        db.session.add(assignment)
+        db.session.commit()
+        flash('Assignment created!')
+        return redirect(url_for('assignments.assignments'))
+
+    return render_template('createAssignment.html',title='Create Assignment', form=form)
+
+def grading_assignment(assignment_id):
+    if not (current_user.is_admin() or current_user.is_lecturer()):
+        abort(403)
+    return db.first_or_404(sa.select(Assignment).where(Assignment.id == assignment_id))
+
+@bp.route('/assignments/<int:assignment_id>/marks', methods=['GET', 'POST'])
+@login_required
+def import_marks_view(assignment_id):
+    assignment = grading_assignment(assignment_id)
+    form = MarksImportForm()
+    result = None
+    if form.validate_on_submit():
+        try:
+            rows = grading.parse_marks(form.file.data.read(), form.file.data.filename)
+        except ValueError as e:
+            form.file.errors.append(str(e))
+        else:
+            result = grading.import_marks(assignment, rows)
+            if not result.errors:
+                flash('Updated marks for {} submissions'.format(result.updated))
+                return redirect(url_for('assignments.detailsAssignment', assignmentid=assignment.id))
+    return render_template('importMarks.html', title='Import Marks', assignment=assignment,
+                           form=form, result=result)
+
+@bp.route('/api/assignments/<int:assignment_id>/marks', methods=['POST'])
+@login_required
+def marks_api(assignment_id):
+    assignment = grading_assignment(assignment_id)
+    if not request.is_json:
+        abort(415)
+    try:
+        rows = grading.parse_marks(request.get_data(), 'marks.json')
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    result = grading.import_marks(assignment, rows)
+    return jsonify(updated=result.updated, errors=result.errors), 400 if result.errors else 200
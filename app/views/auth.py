@@ -0,0 +1,80 @@
+from flask import Blueprint, current_app, render_template, flash, redirect, url_for, request, abort
+from flask_login import current_user, login_user, logout_user, login_required
+import sqlalchemy as sa
+from urllib.parse import urlsplit
+from app import db, audit, passwords
+from app.admission import rate_limit
+from app.models import User
+from app.feed import post_feed
+from app.accounts import activity_counts
+from app.forms import LoginForm, RegistrationForm, RoleForm
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', user_field='username')
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('board.index'))
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = db.session.scalar(
+            sa.select(User).where(User.username == form.username.data))
+        if user is None or not passwords.verify(user, form.password.data):
+            flash('Invalid username or password')
+            return redirect(url_for('auth.login'))
+        if db.session.is_modified(user):
+            # Rehashed under the current PASSWORD_HASH_METHOD
+            db.session.commit()
+        login_user(user, remember=form.remember_me.data)
+        next_page = request.args.get('next')
+        if not next_page or urlsplit(next_page).netloc != '':
+            next_page = url_for('board.index')
+        return redirect(next_page)
+    return render_template('login.html', title='Sign In', form=form)
+
+@bp.route('/logout')
+def logout():
+    logout_user()
+    return redirect(url_for('auth.login'))
+
+@bp.route('/register', methods=['GET', 'POST'])
+@rate_limit('register')
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('board.index'))
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        user = User(username=form.username.data, email=form.email.data)
+        user.set_password(form.password.data)
+        db.session.add(user)
+        db.session.commit()
+        flash('Congratulations, you are now a registered user!')
+        return redirect(url_for('auth.login'))
+    return render_template('register.html', title='Register', form=form)
+
+@bp.route('/user/<username>', methods=['GET', 'POST'])
+@login_required
+def user(username):
+    user = db.first_or_404(sa.select(User).where(User.username == username))
+    form = RoleForm()
+    if form.validate_on_submit() and current_user.is_admin():
+        old_role = user.get_role()
+        user.set_role(int(form.role.data))
+        db.session.commit()
+        audit.record('user.role', user, details='{} -> {}'.format(old_role, user.get_role()))
+    try:
+        page = post_feed(current_app.config['POSTS_PER_PAGE'],
+                         before=request.args.get('before'),
+                         after=request.args.get('after'),
+                         author=user)
+    except ValueError:
+        abort(400)
+    return render_template('user.html', 
+                             user=user,
+                              form = form,
+                               posts=page.items,
+                                page=page,
+                                 counts=activity_counts([user.id])[user.id])
@@ -0,0 +1,68 @@
+from flask import Blueprint, current_app, render_template, flash, redirect, url_for, request, abort, jsonify
+from flask_login import current_user, login_required
+from app import db
+from app.admission import rate_limit
+from app.models import Post
+from app.feed import post_feed, post_to_dict
+from app.search import search, hit_to_dict
+from app.forms import PostForm, SearchForm
+
+bp = Blueprint('board', __name__)
+
+
+@bp.route('/index', methods=['GET', 'POST'])
+@login_required
+@rate_limit('post')
+def index():
+    form = PostForm()
+    if form.validate_on_submit():
+        post = Post(body=form.body.data, user_id=current_user.id,)
+        db.session.add(post)
+        db.session.commit()
+        flash('Posted!')
+        return redirect(url_for('board.index'))
+    page = board_feed()
+    return render_template('index.html',
+                            title='Discussion Board',
+                                posts=page.items,
+                                page=page,
+                                form = form)
+
+def board_feed():
+    try:
+        return post_feed(current_app.config['POSTS_PER_PAGE'],
+                         before=request.args.get('before'),
+                         after=request.args.get('after'))
+    except ValueError:
+        abort(400)
+
+@bp.route('/api/posts')
+@login_required
+def posts_api():
+    page = board_feed()
+    return jsonify(posts=[post_to_dict(post) for post in page.items],
+                   older=page.older,
+                   newer=page.newer)
+
+def search_page():
+    form = SearchForm(request.args)
+    page = request.args.get('page', 1, type=int)
+    if page < 1:
+        abort(400)
+    results = search(form.q.data, current_user, page=page,
+                     per_page=current_app.config['SEARCH_PER_PAGE'])
+    return form, results
+
+@bp.route('/search')
+@login_required
+def search_view():
+    form, results = search_page()
+    return render_template('search.html', title='Search', form=form, results=results)
+
+@bp.route('/api/search')
+@login_required
+def search_api():
+    form, results = search_page()
+    return jsonify(hits=[hit_to_dict(hit) for hit in results.hits],
+                   page=results.page,
+                   has_next=results.has_next)
@@ -0,0 +1,125 @@
+from flask import Blueprint, current_app, render_template, flash, redirect, url_for, request, abort
+from flask_login import current_user, login_required
+import sqlalchemy as sa
+from werkzeug.utils import secure_filename
+from app import db, audit
+from app.admission import rate_limit, upload_slot
+from app.models import FILE_SHARED, File, Submission
+from app.feed import file_feed
+from app.storage import store_upload, send_blob
+from app.thumbnails import SIZES, generate_derivative, derivatives_folder, schedule_derivatives
+from app.avatars import DIGEST, MIN_SIZE, MAX_SIZE, identicon_svg
+from app.forms import UploadForm, DeleteFile, UploadButton, MarksForm
+
+bp = Blueprint('files', __name__)
+
+
+@bp.route('/board', methods=['GET', 'POST'])
+@login_required
+def board():
+    form = UploadButton()
+    if form.validate_on_submit():
+        return redirect(url_for('files.upload'))
+    try:
+        page = file_feed(current_app.config['FILES_PER_PAGE'],
+                         before=request.args.get('before'),
+                         after=request.args.get('after'))
+    except ValueError:
+        abort(400)
+    return render_template('board.html',title='Files', files=page.items, page=page, form=form)
+
+@bp.route('/details/<fileid>', methods=['GET', 'POST'])
+@login_required
+def details(fileid):
+    
+    file = db.session.scalar(sa.select(File).where(File.id == fileid))
+    if file is None:
+        flash('File not found')
+        return redirect(url_for('files.board'))
+    if file.submissions is not None:
+        form = MarksForm()
+        if form.validate_on_submit():
+            submission = db.session.scalar(sa.select(Submission).where(Submission.file_id == fileid))
+            old_marks = submission.marks
+            submission.marks = form.marks.data
+            db.session.commit()
+            audit.record('submission.marks', submission, details='{} -> {}'.format(old_marks, submission.marks))
+            flash('Marks updated!')
+            return redirect(url_for('files.details', fileid=fileid))
+        return render_template('details.html', title='File Details', file=file, form=form)
+    else:
+        form = DeleteFile()
+        if form.validate_on_submit():
+            file = db.session.scalar(sa.select(File).where(fileid == File.id))
+            db.session.delete(file)
+            db.session.commit()
+            audit.record('file.delete', file, details=file.title)
+            flash('Deleted!')
+            return redirect(url_for('files.board'))
+        return render_template('details.html', title='File Details', file=file, form=form)
+
+def allowed_file(filename):
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif'}
+
+@bp.route('/upload', methods=['GET', 'POST'])
+@login_required
+@rate_limit('upload')
+@upload_slot
+def upload():
+    form = UploadForm()
+    
+    if form.validate_on_submit():
+
+        filename = secure_filename(form.file.data.filename)
+        blob = store_upload(form.file.data.stream, filename)
+
+        matching = db.session.scalar(sa.select(File).where(File.content_hash == blob.digest, File.kind == FILE_SHARED))
+        if matching is not None:
+            # The blob is shared with matching, sweep_blobs() clears any leftover
+            flash('This file has already been uploaded as "{}"'.format(matching.title))
+            return redirect(url_for('files.upload'))
+        file = File(filename=filename,
+                    title = form.title.data,
+                      user_id=current_user.id,
+                        path=blob.path,
+                          content_hash=blob.digest,
+                          description=form.description.data)
+        db.session.add(file)
+        schedule_derivatives(file)
+        db.session.commit()
+        flash('File uploaded!')
+
+        return redirect(url_for('files.upload'))
+
+    return render_template('upload.html',title='Upload', form=form)
+
+@bp.route('/uploads/<filename>')
+@login_required
+def uploaded_file(filename):
+    return send_blob(filename)
+
+@bp.route('/uploads/<size>/<filename>')
+@login_required
+def uploaded_derivative(size, filename):
+    if size not in SIZES:
+        abort(404)
+    name = generate_derivative(filename, size)
+    if name is None:
+        return send_blob(filename)
+    return send_blob(name, folder=derivatives_folder())
+
+@bp.route('/avatars/<digest>/<int:size>.svg')
+@login_required
+def avatar(digest, size):
+    if not DIGEST.match(digest) or not MIN_SIZE <= size <= MAX_SIZE:
+        abort(404)
+    # Rendered per request (it takes microseconds) rather than cached on
+    # disk, where any digest a client made up would take up space; the
+    # browser keeps it for good
+    response = current_app.response_class(identicon_svg(digest, size), mimetype='image/svg+xml')
+    response.set_etag(f'{digest}-{size}')
+    response.cache_control.max_age = current_app.config['UPLOAD_CACHE_MAX_AGE']
+    response.cache_control.private = True
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
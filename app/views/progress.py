@@ -0,0 +1,34 @@
+from flask import Blueprint, render_template, abort, Response, stream_with_context
+from flask_login import current_user, login_required
+from datetime import datetime, timezone
+from app import gradebook
+from app.progress import build_progress_matrix, build_student_progress
+
+bp = Blueprint('progress', __name__)
+
+
+@bp.route('/progresstracker')
+@login_required
+def progress_tracker():
+    is_teacher = current_user.is_admin() or current_user.is_lecturer()
+
+    if is_teacher:
+        # For Teachers/Admins: every student (role 2) against every assignment
+        matrix = build_progress_matrix()
+    else:
+        # For Students: their own single row
+        matrix = build_student_progress(current_user)
+
+    return render_template('progresstracker.html', title='Assignment Progress Tracker', matrix=matrix, is_teacher=is_teacher)
+
+@bp.route('/progresstracker/export.<fmt>')
+@login_required
+def export_gradebook(fmt):
+    if not (current_user.is_admin() or current_user.is_lecturer()):
+        abort(403)
+    if fmt not in gradebook.FORMATS:
+        abort(404)
+    generate, mimetype = gradebook.FORMATS[fmt]
+    filename = 'gradebook-{}.{}'.format(datetime.now(timezone.utc).strftime('%Y%m%d'), fmt)
+    return Response(stream_with_context(generate()), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
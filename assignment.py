@@ -1,8 +1,14 @@
 import sqlalchemy as sa
 import sqlalchemy.orm as so
-from app import app, db
+from flask_migrate import Migrate
+from app import create_app, db
 from app.models import User, Post
 
+# Entry point of the flask command.  Migrations are only needed here, so
+# web workers (see wsgi.py) never import Alembic.
+app = create_app()
+migrate = Migrate(app, db)
+
 @app.shell_context_processor
 def make_shell_context():
-    return {'sa': sa, 'so': so, 'db': db, 'User': User, 'Post': Post}
\ No newline at end of file
+    return {'sa': sa, 'so': so, 'db': db, 'User': User, 'Post': Post}
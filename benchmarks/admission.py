@@ -0,0 +1,151 @@
+"""Admission control benchmark.
+
+Two overload scenarios, each run with rate limiting and the upload cap off
+and then on:
+
+    login flood   --attackers threads from one address guess the passwords
+                  of --targets accounts on /login while another address
+                  logs students in one after another; reports how many
+                  guesses were hashed or shed and the other address's
+                  login latency
+    upload burst  --uploaders students upload --size-mb files at once while
+                  a reader pages /index; reports uploads stored or shed
+                  and the latency of the uploads and of the reader
+
+    python -m benchmarks.admission --attackers 8 --uploaders 16
+"""
+import argparse
+import io
+import os
+import threading
+import time
+from benchmarks.common import app, login, seed
+from app import admission
+
+ATTACKER = '203.0.113.7'
+STUDENT_ADDRESS = '198.51.100.20'
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, round(p / 100 * len(values)))] * 1000 if values else 0.0
+
+
+def client_from(address):
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = address
+    return client
+
+
+def configure(enabled, upload_slots, queue_timeout=1):
+    app.config['RATELIMIT_ENABLED'] = enabled
+    app.config['UPLOAD_CONCURRENCY'] = upload_slots
+    app.config['UPLOAD_QUEUE_TIMEOUT'] = queue_timeout
+    # Start from empty buckets and the new number of upload slots
+    app.config['RATELIMIT_STORAGE'] = 'memory'
+    admission.init_app(app)
+
+
+def login_flood(attackers, targets, seconds, logins):
+    deadline = time.perf_counter() + seconds
+    statuses = []
+
+    def attack(n):
+        client = client_from(ATTACKER)
+        tries = 0
+        while time.perf_counter() < deadline:
+            response = client.post('/login', data={
+                'username': f'student{(n + tries) % targets}', 'password': 'guess'})
+            statuses.append(response.status_code)
+            tries += 1
+
+    threads = [threading.Thread(target=attack, args=(n,)) for n in range(attackers)]
+    for thread in threads:
+        thread.start()
+    latencies = []
+    for n in range(logins):
+        client = client_from(STUDENT_ADDRESS)
+        start = time.perf_counter()
+        response = login(client, f'student{targets + n}')
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 302, response.status_code
+    for thread in threads:
+        thread.join()
+    return statuses, latencies
+
+
+def upload_burst(uploaders, size):
+    data = os.urandom(size)
+    clients = []
+    for n in range(uploaders):
+        client = client_from(STUDENT_ADDRESS)
+        login(client, f'student{n}')
+        clients.append(client)
+    reader = client_from(STUDENT_ADDRESS)
+    login(reader, 'lecturer')
+    results, reads = [], []
+    done = threading.Event()
+
+    def upload(n):
+        start = time.perf_counter()
+        response = clients[n].post('/upload', data={
+            'title': f'Upload {n}', 'description': 'benchmark',
+            'file': (io.BytesIO(data[n:] + data[:n]), f'upload-{n}.png')},
+            content_type='multipart/form-data')
+        results.append((response.status_code, time.perf_counter() - start))
+
+    def read():
+        while not done.is_set():
+            start = time.perf_counter()
+            assert reader.get('/index').status_code == 200
+            reads.append(time.perf_counter() - start)
+
+    reading = threading.Thread(target=read)
+    reading.start()
+    threads = [threading.Thread(target=upload, args=(n,)) for n in range(uploaders)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    reading.join()
+    return results, reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--attackers', type=int, default=8)
+    parser.add_argument('--targets', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--logins', type=int, default=10)
+    parser.add_argument('--uploaders', type=int, default=16)
+    parser.add_argument('--size-mb', type=int, default=8)
+    parser.add_argument('--upload-slots', type=int, default=2)
+    parser.add_argument('--queue-timeout', type=float, default=1)
+    args = parser.parse_args()
+
+    seed(students=max(args.targets + args.logins, args.uploaders), assignments=1, posts=200)
+    print(f'login flood: {args.attackers} attackers on {args.targets} accounts for '
+          f'{args.seconds:g} s, {args.logins} logins from another address')
+    for label, enabled in [('off', False), ('on', True)]:
+        configure(enabled, 0)
+        statuses, latencies = login_flood(args.attackers, args.targets, args.seconds, args.logins)
+        shed = statuses.count(429)
+        print(f'    limits {label:3s}: {len(statuses) - shed:5d} guesses hashed, '
+              f'{shed:5d} shed, student login p50 {percentile(latencies, 50):7.1f} ms '
+              f'p95 {percentile(latencies, 95):7.1f} ms')
+
+    print(f'upload burst: {args.uploaders} x {args.size_mb} MiB, '
+          f'{args.upload_slots} upload slots, {args.queue_timeout:g} s queue timeout')
+    for label, enabled, slots in [('off', False, 0), ('on', True, args.upload_slots)]:
+        configure(enabled, slots, args.queue_timeout)
+        results, reads = upload_burst(args.uploaders, args.size_mb * 1024 * 1024)
+        stored = [seconds for status, seconds in results if status == 302]
+        shed = [seconds for status, seconds in results if status == 429]
+        print(f'    limits {label:3s}: {len(stored):3d} stored (p95 {percentile(stored, 95):7.1f} ms), '
+              f'{len(shed):3d} shed (p95 {percentile(shed, 95):7.1f} ms), '
+              f'/index p95 {percentile(reads, 95):7.1f} ms over {len(reads)} reads')
+
+
+if __name__ == '__main__':
+    main()
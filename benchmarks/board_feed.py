@@ -0,0 +1,70 @@
+"""Discussion board feed benchmark.
+
+Seeds boards of increasing size and times the first page, a page in the
+middle of the history and the JSON endpoint.  Then does the same for the
+shared files board next to a growing number of submission files.  Page
+latency and query count should stay flat as either grows.
+
+    python -m benchmarks.board_feed [sizes...]
+"""
+import sys
+import sqlalchemy as sa
+from benchmarks.common import app, count_queries, login, seed, timer
+from app import db
+from app.feed import encode_cursor
+from app.models import FILE_SHARED, File, Post
+
+SIZES = [1000, 100000]
+
+
+SHARED_FILES = 500
+
+
+def middle_cursor(size):
+    with app.app_context():
+        post = db.session.scalar(
+            sa.select(Post).order_by(Post.timestamp.desc(), Post.id.desc())
+            .offset(size // 2).limit(1))
+        return encode_cursor(post.timestamp, post.id)
+
+
+def middle_file_cursor():
+    with app.app_context():
+        file = db.session.scalar(
+            sa.select(File).where(File.kind == FILE_SHARED)
+            .order_by(File.timestamp.desc(), File.id.desc())
+            .offset(SHARED_FILES // 2).limit(1))
+        return encode_cursor(file.timestamp, file.id)
+
+
+def measure(client, label, url):
+    with count_queries() as queries, timer() as elapsed:
+        response = client.get(url)
+    assert response.status_code == 200
+    return f'{label:12s}: {queries.count} queries {elapsed["seconds"] * 1000:8.1f} ms'
+
+
+def main(sizes):
+    for size in sizes:
+        seed(students=50, assignments=0, posts=size)
+        cursor = middle_cursor(size)
+        client = app.test_client()
+        login(client, 'student0')
+        for label, url in [('first page', '/index'),
+                           ('middle page', f'/index?before={cursor}'),
+                           ('json page', f'/api/posts?before={cursor}')]:
+            print(f'{size:8d} posts, ' + measure(client, label, url))
+
+    for size in sizes:
+        # One submission file per student and assignment
+        seed(students=size // 10, assignments=10, submit_ratio=1.0, files=SHARED_FILES)
+        cursor = middle_file_cursor()
+        client = app.test_client()
+        login(client, 'student0')
+        for label, url in [('first page', '/board'),
+                           ('middle page', f'/board?before={cursor}')]:
+            print(f'{size:8d} submission files, ' + measure(client, label, url))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
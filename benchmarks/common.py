@@ -0,0 +1,136 @@
+"""Shared helpers for the benchmark scripts.
+
+Importing this module points the app at a throwaway SQLite database in a
+temp directory, so benchmarks never touch app.db.  Run a benchmark from
+the repository root, e.g. ``python -m benchmarks.progress_matrix``.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+TMPDIR = tempfile.mkdtemp(prefix='labbench-')
+os.environ['DATABASE_URL'] = os.environ.get('BENCH_DATABASE_URL') or \
+    'sqlite:///' + os.path.join(TMPDIR, 'bench.db')
+os.environ['RATELIMIT_STORAGE'] = os.path.join(TMPDIR, 'ratelimit.db')
+os.environ['UPLOAD_SLOTS_FOLDER'] = os.path.join(TMPDIR, 'upload-slots')
+
+import sqlalchemy as sa
+from werkzeug.security import generate_password_hash
+from app import create_app, db, fragments, stats, usercache
+from app.models import FILE_SUBMISSION, User, Post, File, Assignment, Submission
+
+app = create_app()
+app.config['WTF_CSRF_ENABLED'] = False
+app.config['TESTING'] = True
+# Load tests send every request from one address; benchmarks.admission
+# turns limiting back on
+app.config['RATELIMIT_ENABLED'] = False
+app.config['UPLOAD_FOLDER'] = os.path.join(TMPDIR, 'uploads')
+# Jobs stay queued unless a benchmark drains them with app.jobs.run_pending()
+app.config['JOB_WORKERS'] = int(os.environ.get('BENCH_JOB_WORKERS', 0))
+
+BENCH_PASSWORD = 'bench'
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed inside the with-block."""
+    counter = QueryCounter()
+    with app.app_context():
+        engine = db.engine
+    sa.event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        sa.event.remove(engine, 'before_cursor_execute', counter)
+
+
+@contextmanager
+def timer():
+    result = {}
+    start = time.perf_counter()
+    yield result
+    result['seconds'] = time.perf_counter() - start
+
+
+def reset_db():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    # Ids are reused by the next seed, so drop rows cached from this one
+    usercache.cache.clear()
+    fragments.cache.clear()
+
+
+def bulk_insert(model, rows):
+    if rows:
+        db.session.execute(sa.insert(model), rows)
+
+
+def seed(students=10, assignments=5, submit_ratio=0.5, posts=0, files=0):
+    """Fill the database with a synthetic cohort using bulk inserts.
+
+    Creates one admin (``admin``), one lecturer (``lecturer``) and
+    ``students`` students named ``student<n>``, all with BENCH_PASSWORD.
+    Roughly ``submit_ratio`` of the student x assignment cells get a
+    submission with a backing File row.
+    """
+    reset_db()
+    now = datetime.now(timezone.utc)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+    with app.app_context():
+        users = [dict(username='admin', email='admin@bench.local',
+                      password_hash=password_hash, role=0),
+                 dict(username='lecturer', email='lecturer@bench.local',
+                      password_hash=password_hash, role=1)]
+        users += [dict(username=f'student{n}', email=f'student{n}@bench.local',
+                       password_hash=password_hash, role=2)
+                  for n in range(students)]
+        bulk_insert(User, users)
+        bulk_insert(Assignment, [
+            dict(title=f'Assignment {a}', description='Synthetic assignment',
+                 timestamp=now, duedate=now + timedelta(days=a - assignments // 2),
+                 totalMarks=100.0, user_id=2)
+            for a in range(assignments)])
+
+        step = max(1, round(1 / submit_ratio)) if submit_ratio else 0
+        cells = [(s, a) for s in range(students) for a in range(assignments)
+                 if step and (s + a) % step == 0]
+        bulk_insert(File, [
+            dict(filename=f'sub-{s}-{a}.png', timestamp=now, user_id=s + 3,
+                 path=f'uploads/sub-{s}-{a}.png', title=f'Submission {s}/{a}',
+                 description='Synthetic submission', kind=FILE_SUBMISSION)
+            for s, a in cells])
+        bulk_insert(Submission, [
+            dict(title=f'Submission {s}/{a}', description='Synthetic submission',
+                 timestamp=now, user_id=s + 3, file_id=n + 1,
+                 assignment_id=a + 1, marks=float((s * 7 + a) % 101),
+                 overdue=False)
+            for n, (s, a) in enumerate(cells)])
+        bulk_insert(File, [
+            dict(filename=f'shared-{n}.png', timestamp=now - timedelta(seconds=n),
+                 user_id=2, path=f'uploads/shared-{n}.png', title=f'Shared {n}',
+                 description='Synthetic shared file')
+            for n in range(files)])
+        bulk_insert(Post, [
+            dict(body=f'Synthetic post {n}', user_id=n % (students + 2) + 1,
+                 timestamp=now - timedelta(seconds=n // 2))
+            for n in range(posts)])
+        db.session.commit()
+        # The bulk inserts bypass the ORM, so build the assignment stats
+        stats.recompute_all()
+
+
+def login(client, username):
+    return client.post('/login', data={'username': username,
+                                       'password': BENCH_PASSWORD})
@@ -0,0 +1,111 @@
+"""Concurrent write throughput under each SQLite profile.
+
+Seeds a board, then for a few seconds has --writers clients posting to
+/index while --readers clients page through it, and reports writes per
+second, write latency, "database is locked" failures and reads per second.
+Each configuration runs in its own process, since pragmas and pools are
+fixed when the app creates its engines:
+
+    default              SQLite's own settings (rollback journal)
+    production           SQLITE_PROFILE=production (WAL, synchronous=NORMAL, ...)
+    production+readonly  the same with DB_READONLY, GETs on a read-only pool
+
+    python -m benchmarks.db_concurrency --writers 8 --readers 8 --seconds 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+CONFIGURATIONS = {
+    'default': {'SQLITE_PROFILE': 'default'},
+    'production': {'SQLITE_PROFILE': 'production'},
+    'production+readonly': {'SQLITE_PROFILE': 'production', 'DB_READONLY': '1'},
+}
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, round(p / 100 * len(sorted_values)))]
+
+
+def run(args):
+    """Run the workload in this process and print its results as JSON."""
+    import sqlalchemy as sa
+    from benchmarks.common import app, login, seed
+
+    seed(students=args.writers + args.readers, assignments=2, posts=2000)
+    deadline = time.perf_counter() + args.seconds
+    writes, reads, locked = [], [], []
+
+    def writer(n):
+        client = app.test_client()
+        login(client, f'student{n}')
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = client.post('/index', data={'body': f'post from {n}'})
+                assert response.status_code == 302, response.status_code
+            except sa.exc.OperationalError:
+                locked.append(1)
+                continue
+            writes.append(time.perf_counter() - start)
+
+    def reader(n):
+        client = app.test_client()
+        login(client, f'student{args.writers + n}')
+        while time.perf_counter() < deadline:
+            try:
+                assert client.get('/index').status_code == 200
+            except sa.exc.OperationalError:
+                locked.append(1)
+                continue
+            reads.append(1)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = sorted(writes)
+    print(json.dumps({
+        'writes_per_s': len(writes) / args.seconds,
+        'write_p50_ms': percentile(latencies, 50) * 1000 if latencies else None,
+        'write_p95_ms': percentile(latencies, 95) * 1000 if latencies else None,
+        'write_mean_ms': statistics.fmean(latencies) * 1000 if latencies else None,
+        'locked': len(locked),
+        'reads_per_s': len(reads) / args.seconds,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        return run(args)
+
+    print(f'{args.writers} writers, {args.readers} readers, {args.seconds:g} s each')
+    for name, env in CONFIGURATIONS.items():
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.db_concurrency', '--run',
+             '--writers', str(args.writers), '--readers', str(args.readers),
+             '--seconds', str(args.seconds)],
+            env=dict(os.environ, **env), capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(f'    {name:20s} {result["writes_per_s"]:7.1f} writes/s '
+              f'(p50 {result["write_p50_ms"] or 0:6.1f} ms, p95 {result["write_p95_ms"] or 0:7.1f} ms), '
+              f'{result["locked"]:3d} locked, {result["reads_per_s"]:7.1f} reads/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""Deadline rush load test for the submission path.
+
+Seeds a cohort into a temp SQLite database, then drives each route with
+`--concurrency` simultaneous clients, the way students hit the site in the
+last hour before an assignment is due:
+
+    login               POST /login
+    index               GET  /index
+    board               GET  /board
+    submit              POST /detailsAssignment/<id> with an upload
+    progresstracker     GET  /progresstracker (as the lecturer)
+
+For each route it reports p50/p95/p99 latency, throughput and SQL queries
+per request, and with --output writes them as JSON so runs can be diffed.
+
+    python -m benchmarks.deadline_rush --students 300 --concurrency 16
+    python -m benchmarks.deadline_rush --server --output rush.json
+
+By default requests go through Flask's test client; --server runs a
+threaded local WSGI server and sends real HTTP requests instead.
+"""
+import argparse
+import http.cookiejar
+import io
+import json
+import os
+import platform
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from werkzeug.serving import WSGIRequestHandler, make_server
+from benchmarks.common import BENCH_PASSWORD, app, seed
+from app import db
+from app.models import Assignment
+
+# The app reports each request's SQL count in Server-Timing (see
+# app/instrumentation.py), e.g. 'db;dur=1.2;desc="4 queries"'
+DB_TIMING = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def query_count(headers):
+    match = DB_TIMING.search(', '.join(headers.get_all('Server-Timing') or []))
+    return int(match.group(1)) if match else 0
+
+
+class TestClientSession:
+    def __init__(self):
+        self.client = app.test_client()
+
+    def get(self, url):
+        response = self.client.get(url)
+        return response.status_code, response.headers
+
+    def post(self, url, data, files=None):
+        data = dict(data)
+        for name, (filename, content) in (files or {}).items():
+            data[name] = (io.BytesIO(content), filename)
+        response = self.client.post(url, data=data,
+                                    content_type='multipart/form-data')
+        return response.status_code, response.headers
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect())
+
+    def _send(self, request):
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                return response.status, response.headers
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers
+
+    def get(self, url):
+        return self._send(urllib.request.Request(self.base_url + url))
+
+    def post(self, url, data, files=None):
+        boundary = uuid.uuid4().hex
+        body = io.BytesIO()
+        for name, value in data.items():
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; '
+                       f'name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for name, (filename, content) in (files or {}).items():
+            body.write(f'--{boundary}\r\nContent-Disposition: form-data; '
+                       f'name="{name}"; filename="{filename}"\r\n'
+                       f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+            body.write(content + b'\r\n')
+        body.write(f'--{boundary}--\r\n'.encode())
+        return self._send(urllib.request.Request(
+            self.base_url + url, data=body.getvalue(), method='POST',
+            headers={'Content-Type': f'multipart/form-data; boundary={boundary}'}))
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1,
+                max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+def summarize(samples, wall_seconds):
+    latencies = sorted(ms for ms, _, _ in samples)
+    queries = [q for _, q, _ in samples]
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': _round(percentile(latencies, 50)),
+        'p95_ms': _round(percentile(latencies, 95)),
+        'p99_ms': _round(percentile(latencies, 99)),
+        'mean_ms': _round(statistics.fmean(latencies) if latencies else None),
+        'throughput_rps': _round(len(samples) / wall_seconds if wall_seconds else None),
+        'queries_mean': _round(statistics.fmean(queries) if queries else None),
+        'queries_max': max(queries, default=None),
+    }
+
+
+def timed(method, *args, expect=(200, 302), **kwargs):
+    start = time.perf_counter()
+    status, headers = method(*args, **kwargs)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, query_count(headers), status in expect
+
+
+def run_phase(concurrency, tasks):
+    """Run the task callables on `concurrency` threads, collecting samples."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        samples = list(pool.map(lambda task: task(), tasks))
+    return summarize(samples, time.perf_counter() - start)
+
+
+def login_form(username):
+    return {'username': username, 'password': BENCH_PASSWORD}
+
+
+def add_rush_assignment():
+    """A fresh assignment due in an hour, so every student can submit once."""
+    with app.app_context():
+        assignment = Assignment(title='Deadline rush', description='Due soon',
+                                duedate=datetime.now(timezone.utc) + timedelta(hours=1),
+                                totalMarks=100.0, user_id=2)
+        db.session.add(assignment)
+        db.session.commit()
+        return assignment.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--assignments', type=int, default=10)
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests per read-only route')
+    parser.add_argument('--upload-kb', type=int, default=256)
+    parser.add_argument('--server', action='store_true',
+                        help='go through a local threaded WSGI server')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    seed(students=args.students, assignments=args.assignments,
+         posts=args.posts, files=args.files)
+    rush_id = add_rush_assignment()
+
+    server = None
+    if args.server:
+        server = make_server('127.0.0.1', 0, app, threaded=True,
+                             request_handler=_QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        new_session = lambda: HttpSession(base_url)
+    else:
+        new_session = TestClientSession
+
+    students = [f'student{n}' for n in range(args.students)]
+    sessions = {}
+
+    def session_for(username):
+        session = sessions.get(username)
+        if session is None:
+            session = sessions[username] = new_session()
+            session.post('/login', login_form(username))
+        return session
+
+    results = {}
+
+    # Every login is a fresh session, as at the start of a lab
+    login_users = [students[n % len(students)] for n in range(args.requests)]
+    results['login'] = run_phase(args.concurrency, [
+        lambda u=u: timed(new_session().post, '/login', login_form(u))
+        for u in login_users])
+
+    # Log the reading students in outside the measured phases
+    readers = students[:args.concurrency * 4]
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(session_for, readers + ['lecturer']))
+
+    for name, url in [('index', '/index'), ('board', '/board')]:
+        results[name] = run_phase(args.concurrency, [
+            lambda u=readers[n % len(readers)], url=url:
+                timed(sessions[u].get, url, expect=(200,))
+            for n in range(args.requests)])
+
+    payload = os.urandom(args.upload_kb * 1024)
+    submitters = students[:min(len(students), args.requests)]
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        list(pool.map(session_for, submitters))
+    results['submit'] = run_phase(args.concurrency, [
+        lambda u=u: timed(sessions[u].post, f'/detailsAssignment/{rush_id}',
+                          {'title': f'{u} rush', 'description': 'last minute'},
+                          files={'file': (f'{u}.png', payload)})
+        for u in submitters])
+
+    tracker_requests = max(1, args.requests // 10)
+    results['progresstracker'] = run_phase(args.concurrency, [
+        lambda: timed(sessions['lecturer'].get, '/progresstracker', expect=(200,))
+        for _ in range(tracker_requests)])
+
+    if server is not None:
+        server.shutdown()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'mode': 'server' if args.server else 'test_client',
+            'students': args.students,
+            'assignments': args.assignments,
+            'posts': args.posts,
+            'files': args.files,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'upload_kb': args.upload_kb,
+        },
+        'routes': results,
+    }
+
+    print(f'{"route":16s} {"reqs":>5s} {"err":>4s} {"p50 ms":>8s} {"p95 ms":>8s} '
+          f'{"p99 ms":>8s} {"req/s":>8s} {"queries":>8s}')
+    for name, r in results.items():
+        print(f'{name:16s} {r["requests"]:5d} {r["errors"]:4d} {r["p50_ms"]:8.1f} '
+              f'{r["p95_ms"]:8.1f} {r["p99_ms"]:8.1f} {r["throughput_rps"]:8.1f} '
+              f'{r["queries_mean"]:8.1f}')
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(report, out, indent=2)
+        print('wrote', args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Gradebook export benchmark.
+
+Seeds a large cohort and streams /progresstracker/export.<format> for each
+format, reporting time to the first chunk, total time, size and the peak
+Python memory allocated while streaming.  Peak memory should stay flat as
+the cohort grows, since rows are read in GRADEBOOK_YIELD_PER batches and
+sent as they are rendered.
+
+    python -m benchmarks.gradebook_export [students...]
+"""
+import csv
+import io
+import sys
+import time
+import tracemalloc
+import zipfile
+from xml.etree import ElementTree
+from benchmarks.common import app, login, seed
+
+COHORTS = [2000, 20000]
+ASSIGNMENTS = 10
+
+
+def measure(client, fmt):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(f'/progresstracker/export.{fmt}', buffered=False)
+    assert response.status_code == 200, response.status_code
+    first = None
+    size = 0
+    for chunk in response.response:
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(chunk)
+    response.close()
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first, total, size, peak
+
+
+def check(client, students):
+    """The three formats agree on the number of students."""
+    rows = list(csv.reader(io.StringIO(client.get('/progresstracker/export.csv').get_data(as_text=True))))
+    assert len(rows) == students + 1
+    assert len(rows[0]) == 2 + 2 * ASSIGNMENTS
+    lines = client.get('/progresstracker/export.ndjson').get_data().splitlines()
+    assert len(lines) == students
+    workbook = zipfile.ZipFile(io.BytesIO(client.get('/progresstracker/export.xlsx').get_data()))
+    sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+    ns = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    assert len(sheet.find(f'{ns}sheetData')) == students + 1
+
+
+def main(cohorts):
+    for students in cohorts:
+        seed(students=students, assignments=ASSIGNMENTS, submit_ratio=0.5)
+        client = app.test_client()
+        login(client, 'lecturer')
+        check(client, students)
+        print(f'{students} students x {ASSIGNMENTS} assignments')
+        for fmt in ('csv', 'ndjson', 'xlsx'):
+            first, total, size, peak = measure(client, fmt)
+            print(f'    {fmt:7s} first chunk {first * 1000:7.1f} ms, total {total * 1000:8.1f} ms, '
+                  f'{size / 1024:8.0f} KiB, peak memory {peak / 1024:7.0f} KiB')
+
+
+if __name__ == '__main__':
+    main([int(students) for students in sys.argv[1:]] or COHORTS)
@@ -0,0 +1,118 @@
+"""Login throughput benchmark, one run per password hashing policy.
+
+For each PASSWORD_HASH_METHOD, stores every user's password under that
+policy and sends `--logins` POST /login requests from `--concurrency`
+threads.  Meanwhile a logged-in reader keeps fetching /board, to show how
+much a login storm slows the rest of the site.  Reports logins/s, login
+p50/p95 and board p95 per policy.
+
+    python -m benchmarks.login_throughput --logins 200 --concurrency 16
+    PASSWORD_HASH_WORKERS=4 python -m benchmarks.login_throughput
+
+Finally it checks that a hash made under one policy is rewritten under
+the current one on the next successful login.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import sqlalchemy as sa
+from benchmarks.common import BENCH_PASSWORD, app, login, seed
+from app import db
+from app.models import User
+from app.passwords import hash_password, needs_rehash
+
+POLICIES = [
+    'scrypt:32768:8:1',
+    'scrypt:16384:8:1',
+    'pbkdf2:sha256:600000',
+    'pbkdf2:sha256:260000',
+]
+
+
+def use_policy(method):
+    """Make method the current policy and store every password under it."""
+    app.config['PASSWORD_HASH_METHOD'] = method
+    with app.app_context():
+        db.session.execute(sa.update(User).values(
+            password_hash=hash_password(BENCH_PASSWORD)))
+        db.session.commit()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+
+def login_once(username):
+    start = time.perf_counter()
+    response = app.test_client().post('/login', data={'username': username,
+                                                      'password': BENCH_PASSWORD})
+    assert response.status_code == 302 and '/login' not in response.location
+    return (time.perf_counter() - start) * 1000
+
+
+def run(students, logins, concurrency):
+    reader = app.test_client()
+    login(reader, 'admin')
+    board_ms = []
+    done = threading.Event()
+
+    def read_board():
+        while not done.is_set():
+            start = time.perf_counter()
+            reader.get('/board')
+            board_ms.append((time.perf_counter() - start) * 1000)
+
+    thread = threading.Thread(target=read_board)
+    thread.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(login_once,
+                                  [f'student{n % students}' for n in range(logins)]))
+    wall = time.perf_counter() - start
+    done.set()
+    thread.join()
+    return {
+        'logins_per_s': logins / wall,
+        'p50_ms': statistics.median(latencies),
+        'p95_ms': percentile(latencies, 95),
+        'board_p95_ms': percentile(board_ms, 95) if board_ms else 0.0,
+    }
+
+
+def check_rehash():
+    use_policy(POLICIES[0])
+    app.config['PASSWORD_HASH_METHOD'] = POLICIES[-1]
+    login_once('student0')
+    with app.app_context():
+        stored = db.session.scalar(
+            sa.select(User.password_hash).where(User.username == 'student0'))
+        assert not needs_rehash(stored), stored
+    print(f'OK: {POLICIES[0]} hash rewritten as {stored.split("$")[0]} on login')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('policies', nargs='*', default=POLICIES)
+    args = parser.parse_args()
+
+    seed(students=args.students, assignments=0, posts=200)
+    print(f'hashing workers: {app.config["PASSWORD_HASH_WORKERS"]}, '
+          f'concurrency: {args.concurrency}')
+    print(f'{"policy":24s} {"logins/s":>9s} {"p50 ms":>8s} {"p95 ms":>8s} '
+          f'{"board p95":>10s}')
+    for method in args.policies:
+        use_policy(method)
+        r = run(args.students, args.logins, args.concurrency)
+        print(f'{method:24s} {r["logins_per_s"]:9.1f} {r["p50_ms"]:8.1f} '
+              f'{r["p95_ms"]:8.1f} {r["board_p95_ms"]:10.1f}')
+    check_rehash()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Progress tracker benchmark.
+
+Seeds growing synthetic cohorts and checks that building the progress
+matrix issues the same number of queries no matter how many students and
+assignments there are.
+
+    python -m benchmarks.progress_matrix
+"""
+from benchmarks.common import app, count_queries, login, seed, timer
+from app.progress import build_progress_matrix
+
+COHORTS = [(10, 5), (100, 10), (800, 40)]
+
+
+def main():
+    counts = []
+    for students, assignments in COHORTS:
+        seed(students=students, assignments=assignments)
+        with app.app_context():
+            with count_queries() as queries, timer() as elapsed:
+                matrix = build_progress_matrix()
+        assert len(matrix.students) == students
+        assert len(matrix.assignments) == assignments
+
+        client = app.test_client()
+        login(client, 'lecturer')
+        with count_queries() as page_queries, timer() as page_elapsed:
+            response = client.get('/progresstracker')
+        assert response.status_code == 200
+
+        print(f'{students:5d} students x {assignments:3d} assignments: '
+              f'matrix {queries.count} queries {elapsed["seconds"] * 1000:8.1f} ms, '
+              f'page {page_queries.count} queries {page_elapsed["seconds"] * 1000:8.1f} ms')
+        counts.append((queries.count, page_queries.count))
+
+    assert len(set(counts)) == 1, f'query count grew with the cohort: {counts}'
+    print('OK: query count is constant across cohort sizes')
+
+
+if __name__ == '__main__':
+    main()
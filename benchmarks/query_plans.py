@@ -0,0 +1,169 @@
+"""Query plan check.
+
+Seeds large tables, requests each route as the user who would use it,
+captures every SELECT the route runs and EXPLAINs it against the same
+database.  A sequential scan of one of the large tables fails the check
+(exit status 1) unless the route is expected to read the whole table.
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --postgres
+    BENCH_DATABASE_URL=postgresql://localhost/labbench python -m benchmarks.query_plans
+
+--postgres starts a throwaway PostgreSQL cluster in a temp directory (needs
+initdb and pg_ctl on the PATH and psycopg2 installed), otherwise the
+database is SQLite unless BENCH_DATABASE_URL says otherwise.
+"""
+import argparse
+import atexit
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+LARGE_TABLES = {'user', 'post', 'file', 'submission'}
+
+# (name, username, url)
+ROUTES = [
+    ('index', 'student0', '/index'),
+    ('posts api', 'student0', '/api/posts'),
+    ('board', 'student0', '/board'),
+    ('file details', 'lecturer', '/details/{submitted_file}'),
+    ('user profile', 'student0', '/user/student1'),
+    ('user list', 'admin', '/list'),
+    ('user list (role)', 'admin', '/list?role=0'),
+    ('user list (prefix)', 'admin', '/list?prefix=student12'),
+    ('assignments', 'lecturer', '/assignments'),
+    ('assignment (student)', 'student0', '/detailsAssignment/{assignment}'),
+    ('assignment (lecturer)', 'lecturer', '/detailsAssignment/{assignment}'),
+    ('progress (student)', 'student0', '/progresstracker'),
+    ('progress (lecturer)', 'lecturer', '/progresstracker'),
+    ('search', 'student0', '/api/search?q=synthetic+submission'),
+    ('admin board', 'admin', '/adminboard'),
+    ('audit log', 'admin', '/auditlog'),
+]
+
+# Routes that show every row of a table, so reading all of it is the plan
+# the database should pick
+FULL_READS = {
+    'progress (lecturer)': {'user', 'submission'},
+}
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def start_postgres():
+    """Start a PostgreSQL cluster in a temp directory, stopped at exit,
+    and return its URL.
+    """
+    for program in ('initdb', 'pg_ctl'):
+        if shutil.which(program) is None:
+            sys.exit(f'--postgres needs {program} on the PATH')
+    data = tempfile.mkdtemp(prefix='labbench-pg-')
+    subprocess.run(['initdb', '-D', data, '-U', 'labbench', '-A', 'trust'],
+                   check=True, capture_output=True)
+    subprocess.run(['pg_ctl', '-D', data, '-w', '-l', os.path.join(data, 'log'),
+                    '-o', f'-k {data} -c listen_addresses=""', 'start'],
+                   check=True, capture_output=True)
+    atexit.register(subprocess.run, ['pg_ctl', '-D', data, '-m', 'fast', 'stop'],
+                    capture_output=True)
+    return f'postgresql://labbench@/postgres?host={data}'
+
+
+def _table(name):
+    # SQLAlchemy aliases joined tables as <table>_<n>
+    return re.sub(r'_\d+$', '', name)
+
+
+def sequential_scans(connection, statement, parameters):
+    """Tables the database would read in full to run statement."""
+    if connection.dialect.name == 'sqlite':
+        plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        return {_table(match.group(1)) for *_, detail in plan
+                if (match := _SQLITE_SCAN.match(detail))}, [detail for *_, detail in plan]
+    plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+    scans, lines = set(), []
+
+    def walk(node, depth):
+        lines.append('  ' * depth + node['Node Type'] +
+                     (f' on {node["Relation Name"]}' if 'Relation Name' in node else ''))
+        if node['Node Type'] == 'Seq Scan':
+            scans.add(node['Relation Name'])
+        for child in node.get('Plans', ()):
+            walk(child, depth + 1)
+    walk(plan[0]['Plan'], 0)
+    return scans, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--postgres', action='store_true',
+                        help='start a temporary PostgreSQL cluster and check against it')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--posts', type=int, default=50000)
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+    if args.postgres:
+        os.environ['BENCH_DATABASE_URL'] = start_postgres()
+
+    # Imported late so BENCH_DATABASE_URL is set before the app loads
+    import sqlalchemy as sa
+    from benchmarks.common import app, login, seed
+    from app import db
+    from app.models import Submission
+
+    seed(students=args.students, assignments=20, posts=args.posts, files=args.files)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('ANALYZE')
+        values = {'assignment': 1,
+                  'submitted_file': db.session.scalar(sa.select(Submission.file_id).limit(1))}
+        engines = list(db.engines.values())
+        dialect = db.engine.dialect.name
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            captured.append((statement, parameters))
+
+    for engine in engines:
+        sa.event.listen(engine, 'before_cursor_execute', capture)
+    clients = {}
+    failures = 0
+    print(f'{dialect}: {args.students} students, {args.posts} posts, {args.files} files')
+    for name, username, url in ROUTES:
+        if username not in clients:
+            clients[username] = app.test_client()
+            login(clients[username], username)
+        captured.clear()
+        response = clients[username].get(url.format(**values))
+        assert response.status_code == 200, (name, response.status_code)
+        statements = dict(captured)
+        scans = defaultdict(set)
+        with app.app_context(), db.engine.connect() as connection:
+            for statement, parameters in statements.items():
+                tables, plan = sequential_scans(connection, statement, parameters)
+                for table in tables & LARGE_TABLES - FULL_READS.get(name, set()):
+                    scans[table].add(statement)
+                if args.verbose:
+                    print(f'    {" ".join(statement.split())[:200]}')
+                    for line in plan:
+                        print(f'        {line}')
+        status = 'ok' if not scans else 'FAIL: sequential scan of ' + ', '.join(sorted(scans))
+        print(f'    {name:22s} {len(statements):3d} queries  {status}')
+        for table, table_statements in sorted(scans.items()):
+            for statement in table_statements:
+                print(f'        {table}: {" ".join(statement.split())[:300]}')
+        failures += bool(scans)
+    for engine in engines:
+        sa.event.remove(engine, 'before_cursor_execute', capture)
+    if failures:
+        sys.exit(f'{failures} routes scan large tables')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Full text search benchmark.
+
+Seeds boards of increasing size with posts drawn from a small vocabulary
+(so some words are rare and some appear in most posts) and times
+/api/search for a rare word, a common word, a two word query and a prefix
+as a lecturer and as a student.
+
+    python -m benchmarks.search [sizes...]
+"""
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from benchmarks.common import app, bulk_insert, count_queries, login, seed, timer
+from app import db
+from app.models import Post
+
+SIZES = [10000, 300000]
+COMMON = ['deadline', 'lab', 'question', 'marks', 'report']
+RARE = ['zeppelin', 'quokka', 'obsidian']
+FILLER = ['the', 'for', 'about', 'week', 'help', 'please', 'thanks', 'python',
+          'flask', 'database', 'group', 'slides', 'lecture', 'tutorial']
+QUERIES = [('rare', 'quokka'), ('common', 'deadline'),
+           ('two words', 'lab report'), ('prefix', 'tuto*')]
+
+
+def seed_posts(size, students):
+    rng = random.Random(size)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for n in range(size):
+        words = rng.choices(FILLER, k=8) + rng.sample(COMMON, 2)
+        if n % 1000 == 0:
+            words.append(rng.choice(RARE))
+        rng.shuffle(words)
+        rows.append(dict(body=' '.join(words)[:140], user_id=n % students + 1,
+                         timestamp=now - timedelta(seconds=n)))
+    with app.app_context():
+        bulk_insert(Post, rows)
+        db.session.commit()
+
+
+def main(sizes):
+    for size in sizes:
+        seed(students=50, assignments=10, files=200)
+        with timer() as indexing:
+            seed_posts(size, 52)
+        print(f'{size:7d} posts, inserted and indexed in {indexing["seconds"]:.1f} s')
+        for username in ('lecturer', 'student0'):
+            client = app.test_client()
+            login(client, username)
+            for name, text in QUERIES:
+                client.get('/api/search', query_string={'q': text})
+                with count_queries() as queries, timer() as elapsed:
+                    response = client.get('/api/search', query_string={'q': text})
+                assert response.status_code == 200
+                hits = response.get_json()['hits']
+                print(f'    {username:9s} {name:10s} {text!r:14s}: {len(hits):3d} hits '
+                      f'{queries.count} queries {elapsed["seconds"] * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,108 @@
+"""Worker cold start benchmark.
+
+Starts fresh interpreters the way a newly scaled-out worker starts and
+times each step until it has served its first page:
+
+    import      import the app package
+    create      create_app(): extensions, hooks and blueprints
+    first       the first GET /login (compiles base.html and friends)
+    second      the same request again, for comparison
+
+Each configuration runs --runs times and the medians are reported, along
+with the heavy optional modules a worker had loaded by then.  The template
+cache is a throwaway directory: 'cold' starts it empty, 'warm' reuses what
+the cold runs left in it, and 'precompiled' fills it with
+`flask compile-templates` before each run, as a deploy would.
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ['alembic', 'numpy', 'PIL']
+
+
+def run():
+    """Start the app in this process and print its timings as JSON."""
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter()
+    application = app.create_app()
+    created = time.perf_counter()
+    client = application.test_client()
+    assert client.get('/login').status_code == 200
+    first = time.perf_counter()
+    client.get('/login')
+    second = time.perf_counter()
+    print(json.dumps({
+        'import_ms': (imported - start) * 1000,
+        'create_ms': (created - imported) * 1000,
+        'first_ms': (first - created) * 1000,
+        'second_ms': (second - first) * 1000,
+        'loaded': [name for name in HEAVY_MODULES if name in sys.modules],
+    }))
+
+
+def start(env):
+    """Timings of one worker started in a new interpreter with env."""
+    output = subprocess.run([sys.executable, '-m', 'benchmarks.startup', '--run'],
+                            env=dict(os.environ, **env), capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        return run()
+
+    tmpdir = tempfile.mkdtemp(prefix='labbench-')
+    base = {'DATABASE_URL': 'sqlite:///' + os.path.join(tmpdir, 'bench.db'),
+            'JOB_WORKERS': '0'}
+    cache = os.path.join(tmpdir, 'template-cache')
+    cached = dict(base, TEMPLATE_CACHE_DIR=cache)
+
+    def empty():
+        shutil.rmtree(cache, ignore_errors=True)
+
+    def precompile():
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'wsgi',
+                        'compile-templates', '--clear'],
+                       env=dict(os.environ, **cached), capture_output=True, check=True)
+
+    # (name, environment, run before each start)
+    configurations = [
+        ('no template cache', dict(base, TEMPLATE_CACHE_DIR=''), None),
+        ('cold template cache', cached, empty),
+        ('warm template cache', cached, None),
+        ('precompiled', cached, precompile),
+    ]
+    print(f'{"":20s} {"import ms":>10s} {"create ms":>10s} {"first ms":>9s} '
+          f'{"second ms":>10s} {"total ms":>9s}  loaded')
+    for name, env, prepare in configurations:
+        results = []
+        for _ in range(args.runs):
+            if prepare:
+                prepare()
+            results.append(start(env))
+        median = {key: statistics.median(result[key] for result in results)
+                  for key in ('import_ms', 'create_ms', 'first_ms', 'second_ms')}
+        loaded = sorted({module for result in results for module in result['loaded']})
+        print(f'{name:20s} {median["import_ms"]:10.1f} {median["create_ms"]:10.1f} '
+              f'{median["first_ms"]:9.1f} {median["second_ms"]:10.1f} '
+              f'{median["import_ms"] + median["create_ms"] + median["first_ms"]:9.1f}  '
+              f'{", ".join(loaded) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Upload pipeline benchmark.
+
+Measures the peak Python memory of storing one large upload (it should
+stay near UPLOAD_CHUNK_SIZE, not the file size), then drives concurrent
+large uploads through /upload and reports throughput and how many blobs
+ended up on disk.
+
+    python -m benchmarks.uploads [--size-mb N] [--threads N]
+"""
+import argparse
+import io
+import os
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import app, login, seed, timer
+from app.storage import store_upload
+
+
+class PatternStream(io.RawIOBase):
+    """Readable stream of `size` generated bytes that never holds them all."""
+
+    def __init__(self, size, seed_byte):
+        self.remaining = size
+        self.block = bytes((seed_byte + n) % 256 for n in range(4096))
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self.remaining)
+        for offset in range(0, n, len(self.block)):
+            piece = self.block[:n - offset]
+            buffer[offset:offset + len(piece)] = piece
+        self.remaining -= n
+        return n
+
+
+def peak_memory(size):
+    with app.app_context():
+        tracemalloc.start()
+        with timer() as elapsed:
+            blob = store_upload(io.BufferedReader(PatternStream(size, 1)),
+                                'large.png')
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return blob, peak, elapsed['seconds']
+
+
+def upload_once(n, size):
+    client = app.test_client()
+    login(client, 'lecturer')
+    data = os.urandom(size)
+    return client.post('/upload', data={
+        'title': f'Upload {n}', 'description': 'benchmark',
+        'file': (io.BytesIO(data), f'upload-{n}.png')},
+        content_type='multipart/form-data').status_code
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size-mb', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+    seed(students=args.threads, assignments=0)
+
+    blob, peak, seconds = peak_memory(size)
+    print(f'single {args.size_mb} MiB upload: peak traced memory '
+          f'{peak / 1024:.0f} KiB, {args.size_mb / seconds:.0f} MiB/s')
+    assert peak < 4 * app.config['UPLOAD_CHUNK_SIZE'] + 64 * 1024, peak
+
+    blob_again, _, _ = peak_memory(size)
+    assert blob_again.digest == blob.digest and not blob_again.created
+    print('identical upload reused blob', blob.filename[:16] + '...')
+
+    uploads = args.threads * 2
+    with ThreadPoolExecutor(args.threads) as pool, timer() as elapsed:
+        statuses = list(pool.map(upload_once, range(uploads),
+                                 [size // 4] * uploads))
+    assert all(status == 302 for status in statuses), statuses
+    total_mb = uploads * args.size_mb / 4
+    blobs = [name for name in os.listdir(app.config['UPLOAD_FOLDER'])
+             if not name.startswith('.')]
+    print(f'{uploads} concurrent uploads of {args.size_mb // 4} MiB on '
+          f'{args.threads} threads: {elapsed["seconds"]:.2f} s, '
+          f'{total_mb / elapsed["seconds"]:.0f} MiB/s, {len(blobs)} blobs on disk')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Admin user list and profile benchmark.
+
+Seeds cohorts of increasing size and, as the admin, times the first and a
+middle page of /list, the list filtered by role and by username prefix,
+and the profile of a student with many posts.  Latency and query count
+should stay flat as the number of accounts grows.
+
+    python -m benchmarks.user_list [students...]
+"""
+import sys
+import sqlalchemy as sa
+from benchmarks.common import app, count_queries, login, seed, timer
+from app import db
+from app.feed import encode_cursor
+from app.models import User
+
+COHORTS = [1000, 50000]
+
+
+def middle_cursor(students):
+    with app.app_context():
+        user = db.session.scalar(
+            sa.select(User).order_by(User.username, User.id)
+            .offset(students // 2).limit(1))
+        return encode_cursor(user.username, user.id)
+
+
+def main(cohorts):
+    for students in cohorts:
+        seed(students=students, assignments=5, posts=students * 2, files=100)
+        cursor = middle_cursor(students)
+        client = app.test_client()
+        login(client, 'admin')
+        for label, url in [('first page', '/list'),
+                           ('middle page', f'/list?before={cursor}'),
+                           ('lecturers', '/list?role=1'),
+                           ('students', '/list?role=2'),
+                           ('prefix', '/list?prefix=student123'),
+                           ('profile', '/user/student0')]:
+            client.get(url)
+            with count_queries() as queries, timer() as elapsed:
+                response = client.get(url)
+            assert response.status_code == 200
+            print(f'{students:6d} students, {label:12s}: {queries.count} queries '
+                  f'{elapsed["seconds"] * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main([int(students) for students in sys.argv[1:]] or COHORTS)
@@ -0,0 +1,56 @@
+"""added full text search index
+
+Revision ID: 3662d77d43ff
+Revises: f4735fa6d8bf
+Create Date: 2026-10-18 13:19:46.145716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3662d77d43ff'
+down_revision = 'f4735fa6d8bf'
+branch_labels = None
+depends_on = None
+
+TABLES = ['post', 'file', 'assignment', 'submission']
+
+# Same statements as app.search.SCHEMA when this revision was written
+SCHEMA = [
+    "CREATE VIRTUAL TABLE search_index USING fts5(title, body, tokenize='porter unicode61', prefix='2 3')",
+    "INSERT INTO search_index(search_index, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    'CREATE TRIGGER search_post_insert AFTER INSERT ON post BEGIN INSERT INTO search_index(rowid, title, body) VALUES (new.id * 4 + 0, NULL, new.body); END',
+    'CREATE TRIGGER search_post_update AFTER UPDATE OF body ON post BEGIN UPDATE search_index SET title = NULL, body = new.body WHERE rowid = new.id * 4 + 0; END',
+    'CREATE TRIGGER search_post_delete AFTER DELETE ON post BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 0; END',
+    'CREATE TRIGGER search_file_insert AFTER INSERT ON file BEGIN INSERT INTO search_index(rowid, title, body) VALUES (new.id * 4 + 1, new.title, new.description); END',
+    'CREATE TRIGGER search_file_update AFTER UPDATE OF title, description ON file BEGIN UPDATE search_index SET title = new.title, body = new.description WHERE rowid = new.id * 4 + 1; END',
+    'CREATE TRIGGER search_file_delete AFTER DELETE ON file BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 1; END',
+    'CREATE TRIGGER search_assignment_insert AFTER INSERT ON assignment BEGIN INSERT INTO search_index(rowid, title, body) VALUES (new.id * 4 + 2, new.title, new.description); END',
+    'CREATE TRIGGER search_assignment_update AFTER UPDATE OF title, description ON assignment BEGIN UPDATE search_index SET title = new.title, body = new.description WHERE rowid = new.id * 4 + 2; END',
+    'CREATE TRIGGER search_assignment_delete AFTER DELETE ON assignment BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 2; END',
+    'CREATE TRIGGER search_submission_insert AFTER INSERT ON submission BEGIN INSERT INTO search_index(rowid, title, body) VALUES (new.id * 4 + 3, new.title, new.description); END',
+    'CREATE TRIGGER search_submission_update AFTER UPDATE OF title, description ON submission BEGIN UPDATE search_index SET title = new.title, body = new.description WHERE rowid = new.id * 4 + 3; END',
+    'CREATE TRIGGER search_submission_delete AFTER DELETE ON submission BEGIN DELETE FROM search_index WHERE rowid = old.id * 4 + 3; END',
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in SCHEMA:
+        op.execute(statement)
+    op.execute("INSERT INTO search_index(rowid, title, body) SELECT id * 4 + 0, NULL, body FROM post")
+    op.execute("INSERT INTO search_index(rowid, title, body) SELECT id * 4 + 1, title, description FROM file")
+    op.execute("INSERT INTO search_index(rowid, title, body) SELECT id * 4 + 2, title, description FROM assignment")
+    op.execute("INSERT INTO search_index(rowid, title, body) SELECT id * 4 + 3, title, description FROM submission")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in TABLES:
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f'DROP TRIGGER IF EXISTS search_{table}_{event}')
+    op.execute('DROP TABLE IF EXISTS search_index')
